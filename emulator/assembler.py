@@ -1,23 +1,40 @@
-from io import IOBase
-from typing import Union
+from array import array
+from typing import Iterable, Iterator, Optional
 
+from .cache import assembly_key, load_assembly, save_assembly
 from .cpu_base import CPUBase
 
 
 class Assembler:
-    def __init__(self, source: str, output: str = "program.bin") -> None:
+    def __init__(
+        self, source: str, output: Optional[str] = "program.bin", cache: bool = True
+    ) -> None:
+        """
+        Args:
+            source (str): arquivo .asm
+            output (Optional[str], opcional): arquivo .bin gerado. Caso None, a imagem é
+                apenas retornada por execute, sem escrever no disco. Padrão é "program.bin"
+            cache (bool, opcional): Caso True, programas já montados são lidos do cache em
+                disco (ver emulator/cache.py). Padrão é True
+        """
         self.source_file = source
         self.output_file = output
-        self.lines: list[list[str]] = []
-        self.lines_bin: list[list[Union[str, list]]] = []
+        self.cache = cache
         self.names: dict[str, int] = {}  # Nomes e seus valores correspondentes em bytes
 
-        cpu_base = CPUBase()
-        self.instruction_set = cpu_base._ops_dict
-
-        self.inst_args_1 = cpu_base._ops_args[1]  # instruções com 1 argumento
-        self.inst_args_0 = cpu_base._ops_args[0]  # intruções com nenhum argumento
-        self.inst_move = cpu_base._ops_move  # recebem como argumento um marcador
+        tables = CPUBase.tables()  # montadas uma única vez (ver emulator/cache.py)
+        self._tables = tables
+        self.instruction_set = tables.ops_dict
+
+        self.inst_args_1 = tables.ops_args[1]  # instruções com 1 argumento
+        self.inst_args_0 = tables.ops_args[0]  # intruções com nenhum argumento
+        self.inst_move = tables.ops_move  # recebem como argumento um marcador
+        # opcodes cujo argumento é uma variável, endereçada pela palavra (byte // 4)
+        self.word_ops = {
+            self.instruction_set[op]
+            for op in self.inst_args_1
+            if op not in self.inst_move
+        }
         # todas as instruções
         self.instructions = list(self.instruction_set.keys()) + ["wb", "ww"]
 
@@ -37,14 +54,14 @@ class Assembler:
         """
         Transforma em binário as instruções que exigem um argumento (adição, subtração etc)
         """
-        if len(ops) > 0 and self._is_name(ops[0]):
+        if len(ops) > 0:  # o nome é verificado ao ser resolvido (ver _resolve_names)
             return [self.instruction_set[inst], ops[0]]
 
         raise ValueError("Invalid input ", ops)
 
     def _encode_goto(self, ops: list) -> list:
         """Encode da operação goto"""
-        if len(ops) > 0 and self._is_name(ops[0]):
+        if len(ops) > 0:
             return [self.instruction_set["goto"], ops[0]]
         else:
             raise ValueError("Invalid input ", ops)
@@ -105,87 +122,114 @@ class Assembler:
             )  # casos que tem um marcador antes
         )
 
-    def _lines_to_bin(self) -> None:
+    def _split(self, line: str) -> list[str]:
         """
-        Converte todas as linhas para binário
+        Trata as strings tokens para encaixar em um padrão e ignorar comentários
         """
-        for line in self.lines:
-            if not (line_bin := self._line_to_bin(line)):
-                raise SyntaxError(f"Line {line}")
-            self.lines_bin.append(line_bin)
+        l = str(line).split("#")[0]  # ignora comentários de linha
 
-    def _find_line_for_names(self) -> None:
+        return [t for t in l.replace("\n", "").replace(",", "").split(" ") if t]
+
+    def _tokens(self, file: Iterable[str]) -> Iterator[list[str]]:
         """
-        Armazena todos os nomes no atributo self.names com a linha em que ele aparece
+        Gera os tokens de cada linha, ignorando linhas vazias.
+        O arquivo é lido linha a linha, sem carregar todo o código fonte
         """
-        for idx, line in enumerate(self.lines):
-            if line[0] not in self.instructions:
-                self.names[line[0]] = idx
+        for line in file:
+            if tokens := self._split(line):
+                yield tokens
 
-    def _count_bytes(self, line_number: int) -> int:
+    def _encode_line(
+        self, tokens: list[str]
+    ) -> tuple[Optional[str], bytes, list[tuple[int, str, bool]]]:
         """
-        Conta os bytes desde o início até a linha dada.
-        É utilizado para achar os bytes dos nomes
+        Converte uma linha para binário. Os argumentos que são nomes ficam com 0
+        Returns:
+            tuple: marcador definido pela linha (ou None), bytes da linha e referências
+                (posição na linha, nome, se é endereçado pela palavra)
         """
-        line = 0
-        byte = 1
-        while line < line_number:
-            byte += len(self.lines_bin[line])
-            line += 1
-        return byte
-
-    def _get_name_byte(self, name: str) -> int:
-        """Retorna o valor em bytes de um nome"""
-        return self.names[name]
+        label = None
+        if not self._is_instruction(tokens[0]):  # marcador antes da instrução
+            label = tokens[0]
+            if len(tokens) == 1:
+                raise SyntaxError(f"Line {tokens}")
 
-    def _resolve_names(self) -> None:
-        for name in self.names.keys():
-            self.names[name] = self._count_bytes(self.names[name])
+        if not (line_bin := self._line_to_bin(tokens)):
+            raise SyntaxError(f"Line {tokens}")
 
-        for line in self.lines_bin:
-            for i in range(len(line)):
+        refs = []
+        for i, token in enumerate(line_bin):
+            if isinstance(token, str):
+                refs.append((i, token, line_bin[i - 1] in self.word_ops))
+                line_bin[i] = 0
+        return label, bytes(line_bin), refs
 
-                if self._is_name(line[i]):  # type: ignore
-                    line[i] = self._get_name_byte(line[i]) // (  # type: ignore
-                        4
-                        if line[i - 1]  # type: ignore
-                        in [
-                            self.instruction_set[op]
-                            for op in self.inst_args_1
-                            if op not in self.inst_move
-                        ]
-                        else 1
-                    )
-
-    def _load_tokens(self, file: IOBase) -> None:
-        """
-        Trata as strings tokens para encaixar em um padrão e ignorar comentários
+    def _assemble(self, file: Iterable[str]) -> bytearray:
         """
-        for line in file.readlines():
-            l = str(line).split("#")[0]  # ignora comentários de linha
+        Monta a imagem do programa em uma única passagem pelo código fonte.
 
-            tokens = [t for t in l.replace("\n", "").replace(",", "").split(" ") if t]
+        Cada linha é convertida para binário e adicionada à imagem assim que lida.
+        Os argumentos que são nomes ficam com 0 e sua posição é guardada em 'fixups',
+        para ser preenchida por _resolve_names quando todos os nomes forem conhecidos
+        """
+        image = bytearray(1)  # o programa começa no byte 1
+        # nome -> posições na imagem que o referenciam (posição << 1 | endereçado pela palavra)
+        fixups: dict[str, array] = {}
+        for tokens in self._tokens(file):
+            label, line_bin, refs = self._encode_line(tokens)
+            if label is not None:
+                self.names[label] = len(image)
+            for i, name, word in refs:
+                if name not in fixups:
+                    fixups[name] = array("I")
+                fixups[name].append((len(image) + i) << 1 | word)
+            image += line_bin
 
-            if tokens:
-                self.lines.append(tokens)
+        self._resolve_names(image, fixups)
+        return image
 
-    def _write_file(self) -> None:
+    def _resolve_names(self, image: bytearray, fixups: dict[str, array]) -> None:
+        """
+        Preenche na imagem os bytes dos nomes usados como argumento
+        (a palavra, byte // 4, no caso das variáveis)
+        raises:
+            ValueError -> Nome não definido no código fonte
+        """
+        for name, positions in fixups.items():
+            if not self._is_name(name):
+                raise ValueError("Invalid input ", [name])
+            byte = self.names[name]
+            for position in positions:
+                image[position >> 1] = byte // 4 if position & 1 else byte
+
+    def _cache_key(self) -> Optional[str]:
+        """Hash do código fonte e das tabelas de operações (chave do cache)"""
+        with open(self.source_file, "rb") as src:
+            return assembly_key(
+                type(self), iter(lambda: src.read(1 << 16), b""), self._tables
+            )
+
+    def _write_file(self, image: bytes) -> None:
         """Escreve no arquivo binário"""
-        byte_arr = [0]
-        for line in self.lines_bin:
-            for byte in line:
-                byte_arr.append(byte)  # type: ignore
+        with open(self.output_file, "wb") as out:  # type: ignore
+            out.write(image)
 
-            with open(self.output_file, "wb") as out:
-                out.write(bytearray(byte_arr))
-
-    def execute(self) -> None:
-        """Executa o assembler"""
-
-        with open(self.source_file, "r") as src:
-            self._load_tokens(src)  # carrega os tokens
+    def execute(self) -> bytes:
+        """Executa o assembler
+        Returns:
+            bytes: imagem do programa (conteúdo do arquivo .bin)
+        """
 
-        self._find_line_for_names()  # salva os nomes
-        self._lines_to_bin()  # converte todas as linhas para binário
-        self._resolve_names()
-        self._write_file()
+        key = self._cache_key() if self.cache else None
+        cached = load_assembly(key) if key is not None else None
+        if cached is not None:
+            image, self.names = cached
+        else:
+            with open(self.source_file, "r") as src:
+                image = bytes(self._assemble(src))
+            if key is not None:
+                save_assembly(key, image, self.names)
+
+        if self.output_file is not None:
+            self._write_file(image)
+        return image
@@ -0,0 +1,147 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .cpu import CPU
+from .vector import VectorCPU
+
+# registros devolvidos em cada resultado
+RESULT_REGISTERS = ("X", "Y", "H", "K", "PC")
+
+# estado de cada processo: a CPU é criada e a imagem é carregada uma única vez
+_worker: dict = {}
+
+
+class BatchResult(NamedTuple):
+    job: int  # posição da execução na lista de alterações
+    patch: dict  # alterações feitas na memória antes da execução {palavra ou nome: valor}
+    ticks: int  # número de passos
+    halted: bool  # False caso a execução tenha parado por atingir max_ticks
+    registers: dict  # valores finais dos registros de RESULT_REGISTERS
+    words: dict  # valores finais das palavras observadas {palavra: valor}
+
+
+def _init_worker(
+    image: bytes, names: dict, mode: str, watch: tuple, max_ticks: Optional[int]
+) -> None:
+    """Inicializa o processo com a imagem e uma CPU reaproveitada em todas as execuções"""
+    cpu = CPU()
+    cpu.load_image(image, names)
+    _worker["cpu"] = cpu
+    _worker["image"] = image
+    _worker["mode"] = mode
+    _worker["watch"] = watch
+    _worker["max_ticks"] = max_ticks
+
+
+def _run(job: int, patch: dict) -> BatchResult:
+    """Executa o programa com as alterações dadas na memória"""
+    cpu: CPU = _worker["cpu"]
+    cpu.reset()
+
+    for address, value in patch.items():
+        if isinstance(address, str):
+            cpu.set_var(address, value)
+        else:
+            cpu._memory.write_word(address, value)
+
+    ticks = cpu.execute(_worker["mode"], _worker["max_ticks"])
+    return BatchResult(
+        job,
+        patch,
+        ticks,
+        cpu.halted,
+        {name: getattr(cpu._regs, name) for name in RESULT_REGISTERS},
+        {address: cpu._memory.read_word(address) for address in _worker["watch"]},
+    )
+
+
+def _run_vector(jobs: list) -> list[BatchResult]:
+    """Executa um grupo de alterações em lockstep, uma CPU do VectorCPU para cada"""
+    cpu: CPU = _worker["cpu"]
+    vector = VectorCPU(_worker["image"], len(jobs), cpu_base=cpu)
+    for lane, (_, patch) in enumerate(jobs):
+        for address, value in patch.items():
+            if isinstance(address, str):
+                address = cpu._var_address(address)
+            vector.memory[lane, address] = value & 0xFFFFFFFF
+
+    ticks = vector.execute(_worker["max_ticks"])
+    halted = vector.halted()
+    registers = {name: vector.register(name) for name in RESULT_REGISTERS}
+    memory = vector.memory
+    return [
+        BatchResult(
+            job,
+            patch,
+            int(ticks[lane]),
+            bool(halted[lane]),
+            {name: int(values[lane]) for name, values in registers.items()},
+            {address: int(memory[lane, address]) for address in _worker["watch"]},
+        )
+        for lane, (job, patch) in enumerate(jobs)
+    ]
+
+
+def _run_chunk(jobs: list) -> list[BatchResult]:
+    if _worker["mode"] == "vector":
+        return _run_vector(jobs)
+    return [_run(job, patch) for job, patch in jobs]
+
+
+def run_batch(
+    image: bytes,
+    patches: Iterable[dict],
+    watch: Iterable[int] = (1,),
+    mode: str = "fast",
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    names: Optional[dict[str, int]] = None,
+    max_ticks: Optional[int] = None,
+) -> Iterator[BatchResult]:
+    """Executa o mesmo programa várias vezes, em paralelo, com memórias iniciais diferentes.
+
+    As execuções são divididas em grupos de 'chunksize' e distribuídas entre os processos.
+    Os resultados são devolvidos na mesma ordem das alterações, conforme ficam prontos
+    Args:
+        image (bytes): imagem do programa (conteúdo do program.bin)
+        patches (Iterable[dict]): alterações de cada execução {palavra: valor}.
+            Variáveis também podem ser alteradas pelo nome, caso 'names' seja dado
+        watch (Iterable[int], opcional): palavras da memória devolvidas em cada resultado. Padrão é (1,)
+        mode (str, opcional): modo de execução da CPU (ver CPU.execute). No modo "vector",
+            cada grupo é executado em lockstep por um VectorCPU (requer numpy). Padrão é "fast"
+        workers (Optional[int], opcional): número de processos. Padrão é o número de núcleos
+        chunksize (int, opcional): execuções enviadas de uma vez a um processo. Padrão é 64
+        names (Optional[dict[str, int]], opcional): nomes do programa (Assembler.names)
+        max_ticks (Optional[int], opcional): passos máximos de cada execução. As execuções
+            que não chegam ao halt antes disso têm halted = False, sem bloquear o processo.
+            Não é suportado no modo "native". Padrão é sem limite
+    Returns:
+        Iterator[BatchResult]: resultado de cada execução
+    """
+    if mode == "native" and max_ticks is not None:
+        raise ValueError("max_ticks is not supported in native mode")
+    workers = workers or os.cpu_count() or 1
+    jobs = enumerate(patches)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            bytes(image),
+            dict(names or {}),
+            mode,
+            tuple(watch),
+            max_ticks,
+        ),
+    ) as executor:
+        pending: deque = deque()
+        while chunk := list(islice(jobs, chunksize)):
+            pending.append(executor.submit(_run_chunk, chunk))
+            # limita o número de grupos em espera para não carregar todas as execuções de uma vez
+            if len(pending) >= 4 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
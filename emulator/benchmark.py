@@ -0,0 +1,267 @@
+import json
+import os
+import time
+import tracemalloc
+from typing import Iterable, NamedTuple, Optional
+
+from .assembler import Assembler
+from .cpu import CPU
+
+
+class BenchmarkCase(NamedTuple):
+    """Programa executado para cada valor de entrada de 'values'"""
+
+    name: str
+    source: str  # arquivo .asm
+    values: range  # entradas, escritas na palavra 'word' antes de cada execução
+    word: int = 1
+
+
+# programas das questões (ver questoes.md). Os intervalos evitam entradas que não
+# terminam (raiz de 0). Fatoriais acima de 12 estouram os 32 bits, mas o resultado
+# continua sendo determinístico e serve como referência
+CASES = (
+    BenchmarkCase("questao1", "questao1.asm", range(1980, 2041)),
+    BenchmarkCase("questao1_corrigida", "questao1_corrigida.asm", range(1980, 2041)),
+    BenchmarkCase("questao2", "questao2.asm", range(0, 101)),
+    BenchmarkCase("questao3", "questao3.asm", range(1, 21)),
+    BenchmarkCase("questao4", "questao4.asm", range(1, 401)),
+)
+
+
+class BenchmarkResult(NamedTuple):
+    case: str
+    mode: str
+    values: list  # [início, fim) das entradas
+    steps: list  # passos de cada entrada
+    results: list  # valor final da palavra de entrada/saída de cada entrada
+    wall_time: float  # segundos da execução de todas as entradas (melhor repetição)
+    steps_per_second: float
+    peak_memory: int  # bytes alocados no pico de uma execução (CPU, imagem e passos)
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}/{self.mode}"
+
+    def to_dict(self) -> dict:
+        data = self._asdict()
+        del data["case"], data["mode"]
+        return data
+
+
+def _assemble(source: str) -> tuple[bytes, dict[str, int]]:
+    """Monta o programa em memória e retorna a imagem e os nomes"""
+    assembler = Assembler(source, None)
+    return assembler.execute(), assembler.names
+
+
+def _peak_memory(image: bytes, names: dict, case: BenchmarkCase, mode: str) -> int:
+    """Pico de memória alocada ao criar a CPU, carregar a imagem e executar a última entrada"""
+    tracemalloc.start()
+    try:
+        cpu = CPU()
+        cpu.load_image(image, names)
+        cpu._memory.write_word(case.word, case.values[-1])
+        cpu.execute(mode)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _run_values(cpu: CPU, case: BenchmarkCase, mode: str) -> tuple[float, list, list]:
+    """Executa todas as entradas do caso, medindo apenas cpu.execute
+    Returns:
+        tuple[float, list, list]: tempo total, passos e resultados de cada entrada
+    """
+    steps, results = [], []
+    elapsed = 0.0
+    for value in case.values:
+        cpu.reset()
+        cpu._memory.write_word(case.word, value)
+        start = time.perf_counter()
+        steps.append(cpu.execute(mode))
+        elapsed += time.perf_counter() - start
+        results.append(cpu._memory.read_word(case.word))
+    return elapsed, steps, results
+
+
+def run_case(
+    case: BenchmarkCase, modes: Iterable[str] = ("step",), repeat: int = 5
+) -> list[BenchmarkResult]:
+    """Executa o programa para todas as entradas do caso, em cada modo.
+    Cada repetição executa todos os modos, um após o outro, para que variações da
+    máquina durante a medição afetem todos eles da mesma forma
+    Args:
+        case (BenchmarkCase): programa e entradas
+        modes (Iterable[str], opcional): modos de execução da CPU (ver CPU.execute).
+            Padrão é ("step",)
+        repeat (int, opcional): repetições das entradas; o tempo é o da mais rápida. Padrão é 5
+    Returns:
+        list[BenchmarkResult]: passos, resultados, tempo e memória de cada modo
+    """
+    image, names = _assemble(case.source)
+    cpus = {}
+    for mode in modes:
+        cpu = CPU()
+        cpu.load_image(image, names)
+        # a primeira execução compila os blocos (ou traduz o programa) fora da medição
+        cpu._memory.write_word(case.word, case.values[0])
+        cpu.execute(mode)
+        cpus[mode] = cpu
+
+    best = {mode: float("inf") for mode in cpus}
+    runs: dict[str, tuple[list, list]] = {}
+    for _ in range(max(repeat, 1)):
+        for mode, cpu in cpus.items():
+            elapsed, steps, results = _run_values(cpu, case, mode)
+            best[mode] = min(best[mode], elapsed)
+            runs[mode] = steps, results
+
+    return [
+        BenchmarkResult(
+            case.name,
+            mode,
+            [case.values.start, case.values.stop],
+            runs[mode][0],
+            runs[mode][1],
+            best[mode],
+            sum(runs[mode][0]) / best[mode] if best[mode] else 0.0,
+            _peak_memory(image, names, case, mode),
+        )
+        for mode in cpus
+    ]
+
+
+def run_benchmarks(
+    cases: Iterable[BenchmarkCase] = CASES,
+    modes: Iterable[str] = ("step",),
+    repeat: int = 5,
+) -> list[BenchmarkResult]:
+    """Executa run_case para cada caso"""
+    return [result for case in cases for result in run_case(case, modes, repeat)]
+
+
+def load_baseline(path: str) -> dict:
+    """Lê as referências salvas por save_baseline ({} caso o arquivo não exista)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(path: str, results: Iterable[BenchmarkResult]) -> None:
+    """Salva os resultados como referência, mantendo as dos casos e modos não executados"""
+    baseline = load_baseline(path)
+    for result in results:
+        baseline[result.key] = result.to_dict()
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w") as output:
+        json.dump(baseline, output, indent=2, sort_keys=True)
+        output.write("\n")
+
+
+def _speedups(results: Iterable[BenchmarkResult]) -> dict[str, float]:
+    """Passos por segundo de cada resultado dividido pelos do modo "step" do mesmo caso.
+    Apenas os casos medidos também no modo "step" aparecem
+    """
+    results = list(results)
+    step = {r.case: r.steps_per_second for r in results if r.mode == "step"}
+    return {
+        r.key: r.steps_per_second / step[r.case] for r in results if step.get(r.case)
+    }
+
+
+def _baseline_speedups(baseline: dict) -> dict[str, float]:
+    """Como _speedups, para as referências salvas"""
+    speedups = {}
+    for key, reference in baseline.items():
+        case = key.rsplit("/", 1)[0]
+        step = baseline.get(f"{case}/step")
+        if step and step["steps_per_second"]:
+            speedups[key] = reference["steps_per_second"] / step["steps_per_second"]
+    return speedups
+
+
+def compare(
+    results: Iterable[BenchmarkResult], baseline: dict, tolerance: float = 0.2
+) -> list[str]:
+    """Compara os resultados com as referências.
+
+    A velocidade é comparada pelo ganho de cada modo sobre o modo "step" medido na
+    mesma execução, que não depende da máquina: os casos sem o modo "step" nos
+    resultados não têm a velocidade comparada
+    Args:
+        results (Iterable[BenchmarkResult]): resultados de run_benchmarks
+        baseline (dict): referências (load_baseline)
+        tolerance (float, opcional): perda de ganho sobre o modo "step" e aumento de
+            memória aceitos, em fração da referência. Padrão é 0.2 (20%)
+    Returns:
+        list[str]: regressões encontradas (vazia caso não haja). Passos e resultados
+            diferentes da referência são sempre regressões
+    """
+    results = list(results)
+    speedups = _speedups(results)
+    reference_speedups = _baseline_speedups(baseline)
+    problems = []
+    for result in results:
+        reference = baseline.get(result.key)
+        if reference is None:
+            continue
+        if reference["values"] != result.values:
+            problems.append(f"{result.key}: inputs differ from the baseline")
+            continue
+        first = reference["values"][0]
+        for field in ("steps", "results"):
+            for pos, (expected, found) in enumerate(
+                zip(reference[field], getattr(result, field))
+            ):
+                if expected != found:
+                    problems.append(
+                        f"{result.key}: {field} for input {first + pos}: "
+                        f"expected {expected}, got {found}"
+                    )
+        speedup = speedups.get(result.key)
+        expected_speedup = reference_speedups.get(result.key)
+        if (
+            result.mode != "step"
+            and speedup is not None
+            and expected_speedup is not None
+            and speedup < expected_speedup * (1 - tolerance)
+        ):
+            problems.append(
+                f"{result.key}: {speedup:.2f}x faster than step, "
+                f"baseline {expected_speedup:.2f}x"
+            )
+        memory = reference["peak_memory"]
+        if result.peak_memory > memory * (1 + tolerance):
+            problems.append(
+                f"{result.key}: peak memory {result.peak_memory:,} bytes, "
+                f"baseline {memory:,} bytes"
+            )
+    return problems
+
+
+def report(results: Iterable[BenchmarkResult], baseline: Optional[dict] = None) -> str:
+    """Tabela com os resultados, o ganho de cada modo sobre o modo "step" e o ganho
+    nas referências
+    """
+    results = list(results)
+    speedups = _speedups(results)
+    reference_speedups = _baseline_speedups(baseline or {})
+    lines = [
+        f"{'caso':<28}{'entradas':>9}{'passos':>12}{'tempo (s)':>11}"
+        f"{'passos/s':>13}{'memória':>12}{'x step':>9}{'ref':>9}"
+    ]
+    for result in results:
+        speedup = speedups.get(result.key)
+        reference = reference_speedups.get(result.key)
+        lines.append(
+            f"{result.key:<28}{len(result.steps):>9}{sum(result.steps):>12}"
+            f"{result.wall_time:>11.3f}{result.steps_per_second:>13,.0f}"
+            f"{result.peak_memory:>12,}"
+            f"{'' if speedup is None else f'{speedup:.2f}':>9}"
+            f"{'' if reference is None else f'{reference:.2f}':>9}"
+        )
+    return "\n".join(lines)
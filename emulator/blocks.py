@@ -0,0 +1,209 @@
+from array import array
+from typing import Callable, Iterable, Optional
+
+from .components.alu import EXPRESSIONS, SHIFT_EXPRESSIONS
+from .components.registers import SLOTS, WRITE_SLOTS
+
+# nome da variável local usada para cada posição do arquivo de registradores
+REGISTER_NAMES = {slot: name for name, slot in SLOTS.items()}
+
+# tamanho máximo de um bloco (evita laços de microinstruções sem JAM)
+MAX_BLOCK_SIZE = 32
+
+# blocos já compilados, por firmware e conjunto de líderes
+_cache: dict[tuple, list] = {}
+
+
+def operand(reg_num: int) -> str:
+    """Retorna a expressão lida no barramento A ou B para o número do registro dado"""
+    return REGISTER_NAMES[reg_num] if reg_num else "0"
+
+
+def alu_expression(control_bits: int, a: str, b: str) -> tuple:
+    """Monta as expressões de uma operação da ULA
+    Args:
+        control_bits (int): bits de controle (sll8, sra1, f0, f1, enA, enB, invA, inc)
+        a (str): expressão do barramento A
+        b (str): expressão do barramento B
+    Returns:
+        tuple: (expressão da operação, expressão do deslocamento sobre "{res}" ou None)
+    """
+    shift_bits = (control_bits & 0b11000000) >> 6
+    op = EXPRESSIONS[control_bits & 0b00111111].format(a=a, b=b)
+    return op, SHIFT_EXPRESSIONS.get(shift_bits)
+
+
+def memory_statement(mem: int) -> Optional[tuple]:
+    """Retorna o acesso à memória para os bits dados (fetch > read > write)
+    Returns:
+        Optional[tuple]: (comando, registros lidos, registro escrito ou None)
+    """
+    if mem & 0b001:
+        return "MBR = rb(PC)", ("PC",), "MBR"
+    elif mem & 0b010:
+        return "MDR = rw(MAR)", ("MAR",), "MDR"
+    elif mem & 0b100:
+        return "ww(MAR, MDR)", ("MAR", "MDR"), None
+    return None
+
+
+class BlockCompiler:
+    """Compila sequências lineares de microinstruções (sem JAM) em uma única função.
+
+    Cada bloco começa em uma posição do firmware e segue o campo 'next' até uma
+    microinstrução com JAM, até o halt ou até um líder (posição que precisa iniciar um bloco).
+    A função gerada recebe (registradores, ULA, barramento, read_byte, read_word, write_word),
+    aplica todos os efeitos do bloco e retorna o próximo MPC
+    """
+
+    def __init__(
+        self, firmware: array, control_store: list, leaders: Iterable[int] = ()
+    ) -> None:
+        self.firmware = firmware
+        self.control_store = control_store
+        self.leaders = frozenset(leaders)
+
+    def _find_block(self, start: int) -> list[int]:
+        """Retorna as posições do firmware que formam o bloco iniciado em 'start'"""
+        block = [start]
+        while len(block) < MAX_BLOCK_SIZE:
+            nxt, jam = self.control_store[block[-1]][:2]
+            if (
+                jam
+                or not self.firmware[nxt]
+                or nxt in self.leaders
+                or nxt in block
+            ):
+                break
+            block.append(nxt)
+        return block
+
+    def instructions(self, start: int) -> list[int]:
+        """Posições do firmware executadas, em ordem, a cada entrada no bloco de 'start'"""
+        return self._find_block(start)
+
+    def _block_source(self, name: str, block: list[int], counting: bool = False) -> str:
+        """Gera o código python da função de um bloco
+        Args:
+            name (str): nome da função
+            block (list[int]): posições do firmware do bloco
+            counting (bool, opcional): soma em taken[posição] quando o desvio em Z ou N
+                do final do bloco é tomado (ver counting_blocks). Padrão é False
+        """
+        body: list[str] = []
+        read: set[str] = set()
+        written: set[str] = set()
+        has_c = False  # se o barramento C já foi calculado dentro do bloco
+        last_alu = max(
+            (i for i, mpc in enumerate(block) if self.control_store[mpc][2]),
+            default=None,
+        )
+
+        for i, mpc in enumerate(block):
+            nxt, jam, alu, w_regs, mem, r_regsB, r_regsA = self.control_store[mpc]
+            a, b = operand(r_regsA), operand(r_regsB)
+            read.update(reg for reg in (a, b) if reg != "0" and reg not in written)
+
+            if i == len(block) - 1:  # valores finais dos barramentos A e B
+                body.append(f"A = {a}; B = {b}")
+
+            if alu:
+                op, shift = alu_expression(alu, a, b)
+                res = "res" if shift else "C"
+                body.append(f"{res} = {op}")
+                if i == last_alu:  # apenas a última operação define N e Z
+                    body.append(f"N = 1 if {res} else 0; Z = 0 if {res} else 1")
+                if shift:
+                    body.append("C = " + shift.format(res="res"))
+                has_c = True
+
+            slot = WRITE_SLOTS[w_regs]
+            if slot in REGISTER_NAMES:
+                if not has_c:  # barramento C com o valor de um passo anterior
+                    body.insert(0, "C = bus.BUS_C")
+                    has_c = True
+                body.append(f"{REGISTER_NAMES[slot]} = C")
+                written.add(REGISTER_NAMES[slot])
+
+            if access := memory_statement(mem):
+                statement, regs_read, reg_written = access
+                read.update(reg for reg in regs_read if reg not in written)
+                body.append(statement)
+                if reg_written:
+                    written.add(reg_written)
+
+        # próximo MPC
+        flag = None  # flag do desvio em Z ou N
+        if jam & 0b001:
+            flag = "Z" if last_alu is not None else "alu.Z"
+        elif jam & 0b010:
+            flag = "N" if last_alu is not None else "alu.N"
+        if flag is not None:
+            nxt_expr = f"{nxt | 256} if {flag} else {nxt}"
+        elif jam & 0b100:
+            if "MBR" not in written:
+                read.add("MBR")
+            nxt_expr = f"{nxt} | MBR"
+        else:
+            nxt_expr = str(nxt)
+
+        lines = [f"def {name}(f, alu, bus, rb, rw, ww):"]
+        lines += [f"    {reg} = f[{SLOTS[reg]}]" for reg in sorted(read)]
+        lines += [f"    {statement}" for statement in body]
+        lines += [f"    f[{SLOTS[reg]}] = {reg}" for reg in sorted(written)]
+        if last_alu is not None:
+            lines.append("    alu.N = N; alu.Z = Z")
+        lines.append("    bus.BUS_A = A; bus.BUS_B = B")
+        if has_c:
+            lines.append("    bus.BUS_C = C")
+        if counting and flag is not None:
+            lines += [f"    if {flag}:", f"        taken[{block[-1]}] += 1"]
+        lines.append(f"    return {nxt_expr}")
+        return "\n".join(lines)
+
+    def compile(self) -> list[Optional[tuple]]:
+        """Compila um bloco para cada posição não nula do firmware
+        Returns:
+            list[Optional[tuple]]: (função, número de microinstruções) indexado pelo MPC.
+                None nas posições de halt
+        """
+        key = (self.firmware.tobytes(), self.leaders)
+        if key in _cache:
+            return _cache[key]
+
+        sources = []
+        sizes = {}
+        for mpc, instruction in enumerate(self.firmware):
+            if instruction:
+                block = self._find_block(mpc)
+                sources.append(self._block_source(f"block_{mpc}", block))
+                sizes[mpc] = len(block)
+
+        namespace: dict[str, Callable] = {}
+        exec("\n\n".join(sources), namespace)
+
+        blocks: list[Optional[tuple]] = [None] * len(self.firmware)
+        for mpc, size in sizes.items():
+            blocks[mpc] = (namespace[f"block_{mpc}"], size)
+
+        _cache[key] = blocks
+        return blocks
+
+    def counting_blocks(self, starts: Iterable[int], taken: list) -> dict[int, tuple]:
+        """Compila novamente os blocos dados somando em taken[posição] as vezes que o
+        desvio em Z ou N do seu final é tomado (ver emulator/coverage.py). Não são guardados
+        Args:
+            starts (Iterable[int]): posições de início dos blocos
+            taken (list): contagens dos desvios tomados, indexadas pela posição do desvio
+        Returns:
+            dict[int, tuple]: (função, número de microinstruções) de cada bloco
+        """
+        sources, sizes = [], {}
+        for mpc in starts:
+            block = self._find_block(mpc)
+            sources.append(self._block_source(f"block_{mpc}", block, counting=True))
+            sizes[mpc] = len(block)
+
+        namespace: dict = {"taken": taken}
+        exec("\n\n".join(sources), namespace)
+        return {mpc: (namespace[f"block_{mpc}"], size) for mpc, size in sizes.items()}
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from array import array
+from typing import Callable, Iterable, NamedTuple, Optional
+
+# diretório do cache do firmware em disco. Caso vazio, o cache em disco é desativado
+CACHE_DIR_ENV = "EMULATOR_CACHE_DIR"
+_DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "computerEmulator",
+)
+_FORMAT = 1  # versão do formato salvo em disco
+# tamanho máximo do cache de programas montados (ver assembly_key). Os menos usados são removidos
+ASSEMBLY_CACHE_BYTES = 64 << 20
+
+
+class FirmwareTables(NamedTuple):
+    """Firmware montado e tabelas de operações, compartilhados entre as instâncias.
+    Não devem ser alterados
+    """
+
+    firmware: array  # microinstruções ('Q')
+    control_store: list  # campos decodificados de cada microinstrução
+    ops_dict: dict  # operação -> índice de início no firmware
+    ops_args: dict  # número de argumentos -> operações
+    ops_move: list  # operações que recebem um marcador como argumento
+    loops: dict  # início dos laços conhecidos -> tipo do laço
+
+
+# tabelas já montadas neste processo, pela classe que define o firmware (_control)
+_tables: dict[type, FirmwareTables] = {}
+
+
+def _cache_dir() -> Optional[str]:
+    directory = os.environ.get(CACHE_DIR_ENV, _DEFAULT_CACHE_DIR)
+    return directory or None
+
+
+def source_key(cls: type) -> Optional[str]:
+    """Hash do código fonte dos módulos que definem a classe e suas bases.
+    Para o firmware a classe é a que define _control (ver CPUBase.tables): com CPUBase
+    apenas cpu_base.py entra na chave, e alterações em cpu.py não geram um novo firmware.
+    Retorna None caso algum dos módulos não tenha um arquivo (ex: classe criada no prompt)
+    """
+    digest = hashlib.sha256(f"{_FORMAT}:{cls.__module__}.{cls.__qualname__}".encode())
+    for klass in cls.__mro__[:-1]:  # sem 'object'
+        path = getattr(sys.modules.get(klass.__module__), "__file__", None)
+        try:
+            with open(path, "rb") as source:  # type: ignore
+                digest.update(source.read())
+        except (OSError, TypeError):
+            return None
+    return digest.hexdigest()
+
+
+def _load(path: str, decode: Callable[[int], tuple]) -> Optional[FirmwareTables]:
+    try:
+        with open(path, "rb") as disk:
+            saved = pickle.load(disk)
+        firmware = array("Q")
+        firmware.frombytes(saved["firmware"])
+    except (OSError, pickle.PickleError, EOFError, KeyError, TypeError, ValueError):
+        return None
+    return FirmwareTables(
+        firmware,
+        [decode(instruction) for instruction in firmware],
+        saved["ops_dict"],
+        saved["ops_args"],
+        saved["ops_move"],
+        saved["loops"],
+    )
+
+
+def _save(path: str, tables: FirmwareTables) -> None:
+    _write(
+        path,
+        {
+            "firmware": tables.firmware.tobytes(),
+            "ops_dict": tables.ops_dict,
+            "ops_args": tables.ops_args,
+            "ops_move": tables.ops_move,
+            "loops": tables.loops,
+        },
+    )
+
+
+def _prune_firmware(directory: str, keep: str) -> None:
+    """Remove os firmwares salvos por outras versões do código (todos menos 'keep')"""
+    try:
+        with os.scandir(directory) as files:
+            old = [
+                entry.path
+                for entry in files
+                if entry.name.startswith("firmware-") and entry.path != keep
+            ]
+    except OSError:
+        return
+    for path in old:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _write(path: str, saved: dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # escreve em um arquivo temporário e renomeia: outros processos nunca leem um arquivo incompleto
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as disk:
+            pickle.dump(saved, disk, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:  # o cache em disco é opcional
+        pass
+
+
+def firmware_tables(
+    cls: type,
+    build: Callable[[], FirmwareTables],
+    decode: Callable[[int], tuple],
+    validate: Callable[[FirmwareTables], None],
+) -> FirmwareTables:
+    """Retorna o firmware da classe, montando-o no máximo uma vez por processo.
+
+    Procura primeiro no cache do processo, depois no cache em disco
+    (variável de ambiente EMULATOR_CACHE_DIR) e só então monta o firmware.
+    O firmware é verificado uma vez por processo, antes de entrar no cache do processo
+    Args:
+        cls (type): classe que define o firmware (CPUBase ou subclasse que redefine _control)
+        build (Callable[[], FirmwareTables]): monta o firmware
+        decode (Callable[[int], tuple]): decodifica uma microinstrução
+        validate (Callable[[FirmwareTables], None]): verifica o firmware (levanta ValueError)
+    Returns:
+        FirmwareTables: firmware e tabelas de operações
+    """
+    if cls in _tables:
+        return _tables[cls]
+
+    directory = _cache_dir()
+    key = source_key(cls) if directory is not None else None
+    path = None
+    tables = None
+    if key is not None:
+        path = os.path.join(directory, f"firmware-{key[:32]}.pickle")  # type: ignore
+        tables = _load(path, decode)
+    if tables is None:
+        tables = build()
+        if path is not None:
+            _save(path, tables)
+            _prune_firmware(directory, path)  # type: ignore
+
+    validate(tables)
+    _tables[cls] = tables
+    return tables
+
+
+def assembly_key(cls: type, chunks: Iterable[bytes], tables: FirmwareTables) -> Optional[str]:
+    """Hash de um programa: código fonte, tabelas de operações e código do assembler.
+    Retorna None caso o cache em disco esteja desativado ou o assembler não tenha um arquivo
+    Args:
+        cls (type): classe do assembler (Assembler ou subclasse)
+        chunks (Iterable[bytes]): código fonte do programa, em partes
+        tables (FirmwareTables): firmware usado na montagem (CPUBase.tables())
+    """
+    if _cache_dir() is None or (assembler := source_key(cls)) is None:
+        return None
+    digest = hashlib.sha256(assembler.encode())
+    digest.update(
+        repr((tables.ops_dict, tables.ops_args, tables.ops_move)).encode()
+    )
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _assembly_path(key: str) -> str:
+    return os.path.join(_cache_dir(), "assembly", f"{key[:32]}.pickle")  # type: ignore
+
+
+def load_assembly(key: str) -> Optional[tuple[bytes, dict[str, int]]]:
+    """Imagem e nomes de um programa já montado, ou None caso não esteja no cache"""
+    path = _assembly_path(key)
+    try:
+        with open(path, "rb") as disk:
+            saved = pickle.load(disk)
+        os.utime(path)  # usado agora: é o último a ser removido
+        return saved["image"], saved["names"]
+    except (OSError, pickle.PickleError, EOFError, KeyError, TypeError, ValueError):
+        return None
+
+
+def save_assembly(
+    key: str,
+    image: bytes,
+    names: dict[str, int],
+    max_bytes: int = ASSEMBLY_CACHE_BYTES,
+) -> None:
+    """Salva um programa montado, removendo os menos usados caso o cache passe de max_bytes"""
+    path = _assembly_path(key)
+    _write(path, {"image": bytes(image), "names": dict(names)})
+    _evict(os.path.dirname(path), max_bytes)
+
+
+def _evict(directory: str, max_bytes: int) -> None:
+    """Remove os arquivos usados há mais tempo até o diretório caber em max_bytes"""
+    entries = []
+    try:
+        with os.scandir(directory) as files:
+            for entry in files:
+                if entry.name.endswith(".pickle"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:  # outro processo pode ter removido o arquivo
+            pass
+        total -= size
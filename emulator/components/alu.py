@@ -17,6 +17,46 @@ f0 | f1 | enA | enB | invA | inc
 1    1     0     0     0      1     ->   1
 1    1     0     0     1      0     ->   -1
 """
+from typing import Callable, Optional
+
+# expressões de cada operação da ULA indexadas pelos 6 bits de controle (f0, f1, enA, enB, invA, inc).
+# Também são usadas para gerar código (ver emulator/blocks.py)
+EXPRESSIONS: dict[int, str] = {
+    0b011000: "{a}",
+    0b010100: "{b}",
+    0b011010: "~{a}",
+    0b101100: "~{b}",
+    0b111100: "{a} + {b}",
+    0b111101: "{a} + {b} + 1",
+    0b111001: "{a} + 1",
+    0b110101: "{b} + 1",
+    0b111111: "{b} - {a}",
+    0b110110: "{b} - 1",
+    0b111011: "-{a}",
+    0b001100: "{a} & {b}",
+    0b011100: "{a} | {b}",
+    0b010000: "0",
+    0b110001: "1",
+    0b110010: "-1",
+}
+
+# deslocamentos indexados pelos bits (sll8, sra1)
+SHIFT_EXPRESSIONS: dict[int, str] = {
+    0b01: "{res} << 1",  # multiplicação por 2
+    0b10: "{res} >> 1",  # divisão por 2
+    0b11: "{res} << 8",  # soma com 256
+}
+
+_OPERATIONS: dict[int, Callable[[int, int], int]] = {
+    bits: eval(f"lambda a, b: {expr.format(a='a', b='b')}")
+    for bits, expr in EXPRESSIONS.items()
+}
+
+_SHIFTS: dict[int, Optional[Callable[[int], int]]] = {0b00: None}
+_SHIFTS.update(
+    (bits, eval(f"lambda res: {expr.format(res='res')}"))
+    for bits, expr in SHIFT_EXPRESSIONS.items()
+)
 
 
 class ALU:
@@ -24,6 +64,32 @@ class ALU:
         self.N = 0  # não é zero
         self.Z = 1  # é zero
 
+    @classmethod
+    def _build_dispatch(cls) -> list:
+        """Monta a tabela com uma entrada (operação, deslocamento) para cada uma
+        das 256 palavras de controle. Palavras inválidas ficam como None
+        Returns:
+            list: tabela indexada pelos 8 bits de controle
+        """
+        dispatch: list = []
+        for control_bits in range(256):
+            shift_bits, op_bits = cls._parse_operation2(control_bits)
+            op = _OPERATIONS.get(op_bits)
+            dispatch.append(None if op is None else (op, _SHIFTS[shift_bits]))
+        return dispatch
+
+    @classmethod
+    def validate(cls, control_bits: int) -> None:
+        """Verifica se os bits de controle correspondem a uma operação da ULA.
+        Usado ao carregar o firmware, para que a execução não precise verificar
+        Args:
+            control_bits (int): bits de controle de acordo com a arquitetura (sll8, sra1, f0, f1, enA, enB, invA, inc)
+        raises:
+            ValueError -> Operação inválida
+        """
+        if _DISPATCH[control_bits & 0xFF] is None:
+            raise ValueError("Invalid ALU input ", control_bits & 0b111111)
+
     @staticmethod
     def _parse_operation(operation: int) -> tuple:
         """Divide a operação de acordo com os bits de controle da arquitetura (sll8, sra1, f0, f1, enA, enB, invA, inc)
@@ -57,52 +123,17 @@ class ALU:
             b (int): valor B
         Returns:
             int: Resultado da operação
+        Os bits de controle devem ter sido verificados antes com ALU.validate
         """
-        # shift_bits, op, en_a, en_b, inv_a, inc = self._parse_operation(control_bits)
-        shift_bits, control_bits = self._parse_operation2(control_bits)
-
-        if control_bits == 0b011000:
-            res = a
-        elif control_bits == 0b010100:
-            res = b
-        elif control_bits == 0b011010:
-            res = ~a
-        elif control_bits == 0b101100:
-            res = ~b
-        elif control_bits == 0b111100:
-            res = a + b
-        elif control_bits == 0b111101:
-            res = a + b + 1
-        elif control_bits == 0b111001:
-            res = a + 1
-        elif control_bits == 0b110101:
-            res = b + 1
-        elif control_bits == 0b111111:
-            res = b - a
-        elif control_bits == 0b110110:
-            res = b - 1
-        elif control_bits == 0b111011:
-            res = -a
-        elif control_bits == 0b001100:
-            res = a & b
-        elif control_bits == 0b011100:
-            res = a | b
-        elif control_bits == 0b010000:
-            res = 0
-        elif control_bits == 0b110001:
-            res = 1
-        elif control_bits == 0b110010:
-            res = -1
-        else:
-            raise ValueError("Invalid ALU input ", control_bits)
+        op, shift = _DISPATCH[control_bits & 0xFF]
+        res = op(a, b)
 
         # atualiza N e Z
         self.N = int(bool(res))
         self.Z = int(not res)
 
-        if shift_bits == 0b11:  # soma com 256
-            res = res << 8
-        elif shift_bits:  # divisão ou multiplicação por 2
-            res = res << 1 if shift_bits == 0b01 else res >> 1
+        return shift(res) if shift else res
+
 
-        return res
+# tabela de despacho: palavra de controle -> (operação, deslocamento)
+_DISPATCH: list = ALU._build_dispatch()
@@ -1,15 +1,72 @@
+# posição de cada registro no arquivo de registradores.
+# As posições 0-7 são os próprios códigos de leitura dos barramentos A e B (0 = nenhum registro)
+SLOTS = {
+    "PC": 1,  # r: 1 | w: 0b0010000
+    "MBR": 2,  # r: 2 | w:
+    "X": 3,  # r: 3 | w: 0b0001000
+    "Y": 4,  # r: 4 | w: 0b0000100
+    "H": 5,  # r: 5 | w: 0b0000010
+    "K": 6,  # r: 6 | w: 0b0000001
+    "MDR": 7,  # r: 7 | w: 0b0100000
+    "MAR": 8,  # | w: 0b1000000
+}
+_SINK = 9  # destino das escritas que não selecionam nenhum registro
+_SIZE = 10
+
+# bits de escrita do barramento C, em ordem de prioridade (apenas um registro é escrito)
+_WRITE_BITS = (
+    (0b1000000, SLOTS["MAR"]),
+    (0b0100000, SLOTS["MDR"]),
+    (0b0010000, SLOTS["PC"]),
+    (0b0001000, SLOTS["X"]),
+    (0b0000100, SLOTS["Y"]),
+    (0b0000010, SLOTS["H"]),
+    (0b0000001, SLOTS["K"]),
+)
+
+
+def _write_slot(reg_bits: int) -> int:
+    """Retorna a posição do registro escrito para os bits dados do barramento C"""
+    for bit, slot in _WRITE_BITS:
+        if reg_bits & bit:
+            return slot
+    return _SINK
+
+
+# bits do barramento C -> posição no arquivo de registradores
+WRITE_SLOTS = tuple(_write_slot(reg_bits) for reg_bits in range(128))
+
+
+def _register(slot: int) -> property:
+    """Cria o acesso por nome a uma posição do arquivo de registradores"""
+
+    def get(self) -> int:
+        return self._file[slot]
+
+    def set(self, value: int) -> None:
+        self._file[slot] = value
+
+    return property(get, set)
+
+
 class Registers:
+    __slots__ = ("MPC", "MIR", "_file")
+
     def __init__(self) -> None:
         self.MPC = 0
         self.MIR = 0
-        self.MAR = 0  # | w: 0b1000000
-        self.MDR = 0  # r: 7 | w: 0b0010000
-        self.PC = 0  # r: 1 | w: 0b0010000
-        self.MBR = 0  # r: 2 | w:
-        self.X = 0  # r: 3 | w: 0b0001000
-        self.Y = 0  # r: 4 | w: 0b0000100
-        self.H = 0  # r: 5 | w: 0b0000010
-        self.K = 0  # r: 6 | w: 0b0000001
+        # valores de todos os registros, indexados pelas posições de SLOTS.
+        # A posição 0 é sempre 0 (leitura sem registro)
+        self._file = [0] * _SIZE
+
+    MAR = _register(SLOTS["MAR"])
+    MDR = _register(SLOTS["MDR"])
+    PC = _register(SLOTS["PC"])
+    MBR = _register(SLOTS["MBR"])
+    X = _register(SLOTS["X"])
+    Y = _register(SLOTS["Y"])
+    H = _register(SLOTS["H"])
+    K = _register(SLOTS["K"])
 
     def get_reg(self, reg_num: int) -> int:
         """Retorna o valor do registro para o número dado
@@ -18,12 +75,7 @@ class Registers:
         Returns:
             int: valor do registro
         """
-        # TODO: vê se precisa colocar outros números
-        return (
-            [0, self.PC, self.MBR, self.X, self.Y, self.H, self.K, self.MDR][reg_num]
-            if reg_num in range(8)  # checa se está entre 0 e 6
-            else 0
-        )
+        return self._file[reg_num] if 0 <= reg_num < 8 else 0
 
     def write_reg(self, reg_bits: int, value: int) -> None:
         """Armazena o valor dado em um registro
@@ -31,20 +83,7 @@ class Registers:
             reg_bits (int): Bits para o registro (baseado na microarquitetura)
             value (int): valor para armazenar
         """
-        if reg_bits & 0b1000000:
-            self.MAR = value
-        elif reg_bits & 0b0100000:
-            self.MDR = value
-        elif reg_bits & 0b0010000:
-            self.PC = value
-        elif reg_bits & 0b0001000:
-            self.X = value
-        elif reg_bits & 0b0000100:
-            self.Y = value
-        elif reg_bits & 0b0000010:
-            self.H = value
-        elif reg_bits & 0b0000001:
-            self.K = value
+        self._file[WRITE_SLOTS[reg_bits & 0b1111111]] = value
 
     def __str__(self):
         """Converte a classe para string"""
@@ -59,6 +98,4 @@ X = {self.X}
 Y = {self.Y}
 H = {self.H}
 K = {self.K}
-N = {self.N}
-Z = {self.Z}
 """
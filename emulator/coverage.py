@@ -0,0 +1,227 @@
+import json
+from operator import mul
+from typing import Optional
+
+from .log import macro_index
+
+
+class _BlockPlan:
+    """Blocos da execução com contagem e as entradas ainda não somadas às contagens.
+
+    Um desvio só precisa ser contado durante a execução quando seu destino (next | 256)
+    também é alcançado de outra forma. Quando todos os caminhos para o destino são
+    desvios, um deles é calculado pelas execuções do destino menos os demais
+    """
+
+    def __init__(self, coverage: "Coverage", compiler) -> None:
+        firmware, control_store = coverage._firmware, coverage._control_store
+        self.members: list = [None] * len(firmware)  # microinstruções de cada bloco
+        preds: list[set] = [set() for _ in firmware]
+        for mpc, (nxt, jam, *_) in enumerate(control_store):
+            if not firmware[mpc]:
+                continue
+            self.members[mpc] = compiler.instructions(mpc)
+            if jam & 0b011:
+                successors = {nxt, nxt | 256}
+            elif jam & 0b100:
+                successors = {nxt | mbr for mbr in range(256)}
+            else:
+                successors = {nxt}
+            for successor in successors:
+                preds[successor].add(mpc)
+
+        targets: dict[int, list[int]] = {}  # destino -> desvios para ele
+        for mpc in coverage.branches():
+            nxt = control_store[mpc][0]
+            if nxt < 256:  # com next >= 256 os dois caminhos têm o bit 8
+                targets.setdefault(nxt | 256, []).append(mpc)
+
+        counted_branches: set[int] = set()
+        # desvio calculado -> (destino, outros desvios para o destino)
+        self.derived: dict[int, tuple] = {}
+        for target, branches in targets.items():
+            if firmware[target] and preds[target] == set(branches):
+                *others, last = branches
+                self.derived[last] = (target, others)
+                counted_branches.update(others)
+            else:
+                counted_branches.update(branches)
+        # chegadas ao destino de um desvio calculado sem passar pelo desvio
+        # (início e fim das execuções): destino -> correção
+        self.arrivals = {target: 0 for target, _ in self.derived.values()}
+
+        self.entries = [0] * len(firmware)  # entradas em cada bloco, pelo MPC de início
+        self.counted = [0] * len(firmware)  # desvios tomados contados pelos blocos
+        self.sizes = [len(block) if block else 0 for block in self.members]
+        self.ticks = 0  # passos das entradas em 'entries'
+
+        # os blocos que terminam em um desvio contado o contam em 'counted'
+        self.table = list(compiler.compile())
+        starts = [
+            start
+            for start, block in enumerate(self.members)
+            if block and block[-1] in counted_branches
+        ]
+        for start, block in compiler.counting_blocks(starts, self.counted).items():
+            self.table[start] = block
+
+
+class Coverage:
+    """Contagem de execuções de cada posição do firmware (CPU.execute(coverage=...)).
+
+    'hits' tem uma contagem por MPC e 'taken', para as microinstruções com desvio em
+    Z ou N (JAM), quantas vezes o desvio foi tomado (próximo MPC = next | 256).
+    As contagens se acumulam entre execuções, para medir vários programas e entradas.
+
+    No modo "step" cada passo é contado. No modo "blocks" apenas as entradas em cada
+    bloco são contadas, e as contagens de cada MPC são calculadas a partir delas quando
+    'hits' ou 'taken' são lidos (ver block_table)
+    """
+
+    def __init__(self, cpu_base) -> None:
+        """
+        Args:
+            cpu_base (CPUBase): firmware da CPU
+        """
+        size = len(cpu_base.firmware)
+        # listas: o incremento de um int da lista é mais barato que o de um array
+        self._hits = [0] * size
+        self._taken = [0] * size
+        self._firmware = cpu_base.firmware
+        self._control_store = cpu_base.control_store
+        self.macros = macro_index(cpu_base.control_store, cpu_base._ops_dict)
+        self._plans: dict[frozenset, _BlockPlan] = {}  # por conjunto de líderes
+
+    @property
+    def hits(self) -> list[int]:
+        self._add_blocks()
+        return self._hits
+
+    @property
+    def taken(self) -> list[int]:
+        self._add_blocks()
+        return self._taken
+
+    def block_table(self, compiler) -> tuple[list, list[int]]:
+        """Blocos para a execução com contagem (CPU.execute("blocks", coverage=...))
+        Args:
+            compiler (BlockCompiler): compilador dos blocos do firmware
+        Returns:
+            tuple: (função, tamanho) de cada bloco indexado pelo MPC, como em
+                BlockCompiler.compile, e a lista onde somar as entradas em cada bloco
+        """
+        if compiler.leaders not in self._plans:
+            self._plans[compiler.leaders] = _BlockPlan(self, compiler)
+        plan = self._plans[compiler.leaders]
+        return plan.table, plan.entries
+
+    def end_blocks(self, compiler, start: int, end: Optional[int]) -> int:
+        """Termina uma execução com os blocos de block_table
+        Args:
+            compiler (BlockCompiler): compilador dado a block_table
+            start (int): MPC no início da execução
+            end (Optional[int]): MPC ao final da execução (o próximo bloco, não executado).
+                None caso a execução tenha sido interrompida por um erro
+        Returns:
+            int: número de passos executados pelos blocos
+        """
+        plan = self._plans[compiler.leaders]
+        arrivals = plan.arrivals
+        if start in arrivals:
+            arrivals[start] -= 1
+        if end in arrivals:
+            arrivals[end] += 1
+        ticks = sum(map(mul, plan.sizes, plan.entries))
+        previous, plan.ticks = plan.ticks, ticks
+        return ticks - previous
+
+    def _add_blocks(self) -> None:
+        """Soma às contagens de cada MPC as entradas nos blocos ainda não somadas"""
+        for plan in self._plans.values():
+            if not plan.ticks:
+                continue
+            hits: dict[int, int] = {}
+            for block, count in enumerate(plan.entries):
+                if count:
+                    for mpc in plan.members[block]:
+                        hits[mpc] = hits.get(mpc, 0) + count
+
+            counted = plan.counted
+            for mpc, count in hits.items():
+                self._hits[mpc] += count
+                nxt, jam = self._control_store[mpc][:2]
+                if mpc in plan.derived:
+                    target, others = plan.derived[mpc]
+                    arrivals = hits.get(target, 0) + plan.arrivals[target]
+                    others_taken = sum(counted[other] for other in others)
+                    self._taken[mpc] += arrivals - others_taken
+                elif jam & 0b011 and nxt < 256:
+                    self._taken[mpc] += counted[mpc]
+                else:
+                    # sem desvio em Z ou N: o bit 8 do próximo MPC é o do campo 'next'
+                    self._taken[mpc] += count * (nxt >> 8)
+
+            plan.entries[:] = [0] * len(plan.entries)
+            plan.counted[:] = [0] * len(plan.counted)
+            plan.arrivals = dict.fromkeys(plan.arrivals, 0)
+            plan.ticks = 0
+
+    @property
+    def ticks(self) -> int:
+        return sum(self.hits)
+
+    def branches(self) -> list[int]:
+        """Posições com desvio em Z ou N"""
+        return [
+            mpc
+            for mpc, fields in enumerate(self._control_store)
+            if self._firmware[mpc] and fields[1] & 0b011
+        ]
+
+    def unreached(self) -> list[int]:
+        """Posições do firmware (não vazias) que nunca foram executadas"""
+        return [
+            mpc
+            for mpc, instruction in enumerate(self._firmware)
+            if instruction and not self.hits[mpc]
+        ]
+
+    def to_dict(self) -> dict:
+        """Contagens em um dicionário (formato do JSON)"""
+        used = sum(1 for instruction in self._firmware if instruction)
+        reached = used - len(self.unreached())
+        slots = {
+            str(mpc): {"macro": self.macros[mpc], "hits": hits}
+            for mpc, hits in enumerate(self.hits)
+            if hits
+        }
+        branches = {}
+        for mpc in self.branches():
+            fallthrough = self._control_store[mpc][0]
+            branches[str(mpc)] = {
+                "macro": self.macros[mpc],
+                "condition": "Z" if self._control_store[mpc][1] & 0b001 else "N",
+                "target": fallthrough | 256,
+                "fallthrough": fallthrough,
+                "taken": self.taken[mpc],
+                "not_taken": self.hits[mpc] - self.taken[mpc],
+            }
+        return {
+            "ticks": self.ticks,
+            "slots_used": used,
+            "slots_reached": reached,
+            "coverage": reached / used if used else 0.0,
+            "slots": slots,
+            "branches": branches,
+            "unreached": [
+                {"mpc": mpc, "macro": self.macros[mpc]} for mpc in self.unreached()
+            ],
+        }
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def write_json(self, path: str) -> None:
+        """Salva as contagens em um arquivo JSON"""
+        with open(path, "w") as output:
+            output.write(self.to_json())
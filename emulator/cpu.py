@@ -1,65 +1,487 @@
+import sys
 from array import array
-from typing import Optional
+from typing import NamedTuple, Optional, Union
 
 from emulator.cpu_base import CPUBase
 
+from .blocks import BlockCompiler
 from .components import ALU, Bus, Registers
-from .memory import Memory
+from .components.registers import WRITE_SLOTS
+from .coverage import Coverage
+from .fastforward import fast_forward_table
+from .log import LOGGED_SLOTS, RECORD_SIZE, ExecutionLog
+from .profiler import Profile
+from .trace import TraceWriter
+from .memory import Memory, PagedMemory
+from .translator import NativeProgram, Translator
+
+
+class Snapshot(NamedTuple):
+    """Estado completo de uma CPU em um ponto da execução (ver CPU.snapshot)"""
+
+    registers: tuple  # valores de Registers._file
+    mpc: int
+    mir: int
+    flags: tuple  # (N, Z) da ULA
+    bus: tuple  # (BUS_A, BUS_B, BUS_C)
+    memory: Union[Memory, PagedMemory]  # cópia da memória, nunca executada diretamente
 
 
 class CPU(CPUBase):
     """Emula uma CPU"""
 
-    def __init__(self, log: bool = False) -> None:
+    def __init__(
+        self, log: bool = False, memory: Optional[Union[Memory, PagedMemory]] = None
+    ) -> None:
         """
         Args:
             log (bool, opcional): Caso True, irá exibir mensagens de log no prompt. Padrão é False.
+            memory (Optional[Union[Memory, PagedMemory]], opcional): memória da CPU.
+                Padrão é uma nova Memory (1Mb alocado). PagedMemory aloca apenas as páginas escritas
+                e é a única em que snapshot, restore e fork são baratos (cópia na escrita):
+                com Memory cada um deles copia o 1Mb inteiro
         """
         super().__init__()
         self._regs = Registers()
         self._alu = ALU()
         self._bus = Bus()
-        self._memory = Memory()
+        self._memory = Memory() if memory is None else memory
         self._last_inst_idx = 0
         self.display_log = log
+        # log da execução: por padrão exibido no prompt (ver emulator/log.py)
+        self.log: Optional[ExecutionLog] = None
+        self.names: dict[str, int] = {}  # nomes do programa e seus bytes (Assembler.names)
+        self._native: Optional[NativeProgram] = None  # programa traduzido (modo "native")
 
-    def read_image(self, img: str) -> None:
+    def read_image(self, img: str, names: Optional[dict[str, int]] = None) -> None:
         """Lê um arquivo .bin
         Args:
             img (str): path para o arquivo
+            names (Optional[dict[str, int]], opcional): nomes do programa (Assembler.names),
+                usados por set_var e get_var
         """
-        byte_address = 0
         with open(img, "rb") as disk:
-            while byte := disk.read(1):
-                self._memory.write_byte(byte_address, int.from_bytes(byte, "little"))
-                byte_address += 1
+            self.load_image(disk.read(), names)
+
+    def load_image(self, image: bytes, names: Optional[dict[str, int]] = None) -> None:
+        """Carrega na memória uma imagem já lida (conteúdo de um arquivo .bin)
+        Args:
+            image (bytes): bytes do programa, a partir do endereço 0
+            names (Optional[dict[str, int]], opcional): nomes do programa (Assembler.names)
+        """
+        self._native = None
+        if names is not None:
+            self.names = dict(names)
+        self._memory.load(image)
+        self._memory.checkpoint()
+
+    def reset(self) -> None:
+        """Volta a CPU ao estado logo após o carregamento da imagem (load_image).
+
+        Registros, barramentos e flags da ULA voltam aos valores iniciais e apenas as
+        páginas da memória escritas desde o carregamento são restauradas, então a
+        mesma CPU pode executar o programa várias vezes sem recarregar a imagem
+        """
+        self._regs = Registers()
+        self._alu = ALU()
+        self._bus = Bus()
+        self._memory.restore()
+        self._last_inst_idx = 0
+
+    def snapshot(self) -> Snapshot:
+        """Guarda o estado atual da CPU (registros, MPC, flags, barramentos e memória).
+
+        Com PagedMemory as páginas são compartilhadas entre a CPU e o snapshot e só são
+        copiadas quando escritas; com Memory (o padrão) todo o 1Mb é copiado a cada
+        snapshot. Para muitos snapshots, crie a CPU com CPU(memory=PagedMemory())
+        Returns:
+            Snapshot: estado atual, que pode ser usado por restore várias vezes
+        """
+        return self._state(self._memory.fork())
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """Volta a CPU ao estado guardado por snapshot.
+        A memória do snapshot é copiada como em snapshot (todo o 1Mb com Memory)
+        Args:
+            snapshot (Snapshot): estado retornado por snapshot
+        """
+        self._set_state(snapshot)
+        self._memory = snapshot.memory.fork()
+        self._native = None  # o snapshot pode ser de outro programa
+
+    def fork(self) -> "CPU":
+        """Cria uma nova CPU no mesmo estado desta (ex: para testar variações de
+        memória a partir de um ponto da execução, sem executar tudo desde o início).
+
+        Com PagedMemory as duas CPUs compartilham as páginas até escreverem nelas;
+        com Memory (o padrão) todo o 1Mb é copiado a cada fork
+        Returns:
+            CPU: cópia independente da CPU
+        """
+        memory = self._memory.fork()
+        clone = type(self)(self.display_log, memory)
+        clone._set_state(self._state(memory))
+        clone.names = dict(self.names)
+        clone._native = self._native
+        return clone
+
+    def _state(self, memory: Union[Memory, PagedMemory]) -> Snapshot:
+        regs, alu, bus = self._regs, self._alu, self._bus
+        return Snapshot(
+            tuple(regs._file),
+            regs.MPC,
+            regs.MIR,
+            (alu.N, alu.Z),
+            (bus.BUS_A, bus.BUS_B, bus.BUS_C),
+            memory,
+        )
+
+    def _set_state(self, snapshot: Snapshot) -> None:
+        self._regs = Registers()
+        self._regs._file[:] = snapshot.registers
+        self._regs.MPC, self._regs.MIR = snapshot.mpc, snapshot.mir
+        self._alu = ALU()
+        self._alu.N, self._alu.Z = snapshot.flags
+        self._bus = Bus()
+        self._bus.BUS_A, self._bus.BUS_B, self._bus.BUS_C = snapshot.bus
+
+    @property
+    def halted(self) -> bool:
+        """Se a CPU chegou ao halt (a microinstrução no MPC é nula)"""
+        return not self.firmware[self._regs.MPC]
 
-    def execute(self) -> int:
+    def _var_address(self, name: str) -> int:
+        """Retorna a palavra da memória de uma variável do programa"""
+        if name not in self.names:
+            raise KeyError(f"Unknown variable {name}")
+        # assim como no assembler, variáveis são acessadas pela palavra (byte // 4)
+        return self.names[name] // 4
+
+    def set_var(self, name: str, value: int) -> None:
+        """Altera o valor de uma variável do programa (ex: cpu.set_var("in_out", 100))
+        Args:
+            name (str): nome da variável no código fonte
+            value (int): novo valor
+        """
+        self._memory.write_word(self._var_address(name), value)
+
+    def get_var(self, name: str) -> int:
+        """Retorna o valor de uma variável do programa
+        Args:
+            name (str): nome da variável no código fonte
+        Returns:
+            int: valor da variável
+        """
+        return self._memory.read_word(self._var_address(name))
+
+    def execute(
+        self,
+        mode: str = "step",
+        max_ticks: Optional[int] = None,
+        trace: Optional[str] = None,
+        profile: Optional[Profile] = None,
+        coverage: Optional[Coverage] = None,
+    ) -> int:
         """
         Execução da CPU
+        Args:
+            mode (str, opcional): "step" executa uma microinstrução por vez.
+                "blocks" executa blocos de microinstruções compilados (ver emulator/blocks.py).
+                "fast" executa em blocos e calcula diretamente os laços conhecidos do firmware
+                (multXY, divXY, divisXY...) (ver emulator/fastforward.py).
+                "native" traduz o programa carregado para uma função python (ver emulator/translator.py).
+                Padrão é "step"
+            max_ticks (Optional[int], opcional): para após esse número de passos, mesmo sem
+                chegar ao halt (a execução pode continuar com outra chamada). Não é suportado
+                no modo "native". Padrão é sem limite
+            trace (Optional[str], opcional): arquivo onde será gravado o trace binário da
+                execução (ver emulator/trace.py). Apenas no modo "step". Padrão é None
+            profile (Optional[Profile], opcional): acumula os passos por instrução e endereço
+                do programa (ver emulator/profiler.py). Apenas no modo "step". Padrão é None
+            coverage (Optional[Coverage], opcional): acumula as execuções de cada posição do
+                firmware e dos desvios (ver emulator/coverage.py). Nos modos "step" (conta
+                cada passo) e "blocks" (conta as entradas em cada bloco, com um custo de
+                poucos por cento sobre o modo "blocks"). Padrão é None
         Retorna:
             int: Número de passos
         """
+        instruments = [
+            self.display_log,
+            trace is not None,
+            profile is not None,
+            coverage is not None,
+        ]
+        if any(instruments):
+            if sum(instruments) > 1:
+                raise ValueError(
+                    "Only one of log, trace, profile and coverage can be used at a time"
+                )
+            if coverage is not None and mode == "blocks":
+                return self._run_blocks_covered(coverage, max_ticks)
+            if mode != "step":
+                raise ValueError(
+                    "Logging, tracing and profiling are only supported in step mode, "
+                    "coverage in step and blocks modes",
+                    mode,
+                )
+            if trace is not None:
+                return self._run_traced(trace, max_ticks)
+            if profile is not None:
+                return self._run_profiled(profile, max_ticks)
+            if coverage is not None:
+                return self._run_covered(coverage, max_ticks)
+            return self._run_logged(max_ticks)
+
+        if mode == "step":
+            ticks = 0
+            if max_ticks is None:
+                while self._step():
+                    ticks += 1
+            else:
+                while ticks < max_ticks and self._step():
+                    ticks += 1
+            return ticks
+        elif mode == "blocks":
+            return self._run_blocks(
+                BlockCompiler(self.firmware, self.control_store), max_ticks=max_ticks
+            )
+        elif mode == "fast":
+            return self._run_blocks(
+                BlockCompiler(self.firmware, self.control_store, self._loops),
+                fast_forward_table(self.control_store, self._loops),
+                max_ticks,
+            )
+        elif mode == "native":
+            if max_ticks is not None:
+                raise ValueError("max_ticks is not supported in native mode")
+            return self._run_native()
+
+        raise ValueError("Invalid execution mode ", mode)
+
+    def _run_logged(self, max_ticks: Optional[int] = None) -> int:
+        """Executa passo a passo guardando cada passo no log
+        Retorna:
+            int: Número de passos
+        """
+        if self.log is None:
+            self.log = ExecutionLog(self, sys.stdout)
+        log = self.log
+        records = log.records
+        registers = self._regs._file
+        slot_x, slot_y, slot_k = LOGGED_SLOTS
+        limit = log.buffer * RECORD_SIZE
+
         ticks = 0
-        while self._step():
+        try:
+            while max_ticks is None or ticks < max_ticks:
+                records += (
+                    self._regs.MPC,
+                    registers[slot_x],
+                    registers[slot_y],
+                    registers[slot_k],
+                )
+                if len(records) >= limit:
+                    log.flush()
+                if not self._step():
+                    break
+                ticks += 1
+        finally:
+            log.flush()
+        return ticks
+
+    def _run_traced(self, path: str, max_ticks: Optional[int] = None) -> int:
+        """Executa passo a passo gravando o trace binário
+        Retorna:
+            int: Número de passos
+        """
+        regs, alu = self._regs, self._alu
+        registers = regs._file
+        trace = TraceWriter(path)
+        trace.start(regs.MPC, alu.N, alu.Z, registers, self._memory.items())
+
+        ticks = 0
+        try:
+            while max_ticks is None or ticks < max_ticks:
+                mpc = regs.MPC
+                if not self._step():
+                    break
+                write = None
+                if self.control_store[mpc][4] & 0b111 == 0b100:  # write_word
+                    address = regs.MAR & 0x7FFFF
+                    write = (address, self._memory.read_word(address))
+                trace.step(ticks, mpc, alu.N, alu.Z, registers, write)
+                ticks += 1
+        finally:
+            trace.close(ticks, regs.MPC)
+        return ticks
+
+    def _run_profiled(self, profile: Profile, max_ticks: Optional[int] = None) -> int:
+        """Executa passo a passo contando os passos de cada MPC e instrução do programa
+        Retorna:
+            int: Número de passos
+        """
+        regs = self._regs
+        counts, dispatches = profile.counts, profile.dispatches
+        address = regs.PC  # endereço do opcode da instrução em execução
+
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            mpc = regs.MPC
+            if not self._step():
+                break
+            if not mpc:  # main: PC aponta para o opcode buscado
+                address = regs.PC
+            key = address << 9 | mpc
+            counts[key] = counts.get(key, 0) + 1
+            if dispatches[mpc]:  # a instrução buscou e desviou para o próximo opcode
+                address = regs.PC
             ticks += 1
         return ticks
 
+    def _run_covered(self, coverage: Coverage, max_ticks: Optional[int] = None) -> int:
+        """Executa passo a passo contando as execuções de cada MPC e os desvios tomados
+        Retorna:
+            int: Número de passos
+        """
+        regs, step = self._regs, self._step
+        hits, taken = coverage.hits, coverage.taken
+        if max_ticks is None:
+            max_ticks = -1  # sem limite: ticks nunca chega a -1
+
+        # os desvios em Z ou N vão para next | 256 e 'next' é sempre menor que 256,
+        # então o bit 8 do MPC seguinte indica se o desvio foi tomado
+        ticks = 0
+        while ticks != max_ticks:
+            mpc = regs.MPC
+            if not step():
+                break
+            hits[mpc] += 1
+            taken[mpc] += regs.MPC >> 8
+            ticks += 1
+        return ticks
+
+    def _run_blocks_covered(
+        self, coverage: Coverage, max_ticks: Optional[int] = None
+    ) -> int:
+        """Executa bloco a bloco contando apenas as entradas em cada bloco.
+        As contagens de cada MPC e dos desvios são calculadas a partir delas
+        (ver emulator/coverage.py)
+        Retorna:
+            int: Número de passos
+        """
+        compiler = BlockCompiler(self.firmware, self.control_store)
+        table, entries = coverage.block_table(compiler)
+        registers = self._regs._file
+        alu, bus, memory = self._alu, self._bus, self._memory
+        rb, rw, ww = memory.read_byte, memory.read_word, memory.write_word
+
+        start = mpc = self._regs.MPC
+        try:
+            if max_ticks is None:
+                while block := table[mpc]:
+                    entries[mpc] += 1
+                    mpc = block[0](registers, alu, bus, rb, rw, ww)
+            else:
+                ticks = 0
+                while block := table[mpc]:
+                    fn, size = block
+                    if ticks + size > max_ticks:
+                        break
+                    entries[mpc] += 1
+                    mpc = fn(registers, alu, bus, rb, rw, ww)
+                    ticks += size
+        except BaseException:
+            # o bloco em 'mpc' já foi contado: não há chegada pendente
+            coverage.end_blocks(compiler, start, None)
+            raise
+        ticks = coverage.end_blocks(compiler, start, mpc)
+
+        self._regs.MPC = mpc
+        self._regs.MIR = self.firmware[mpc]
+        if max_ticks is not None:
+            ticks += self._run_covered(coverage, max_ticks - ticks)
+        return ticks
+
+    def _run_blocks(
+        self,
+        compiler: BlockCompiler,
+        fast_forward: Optional[list] = None,
+        max_ticks: Optional[int] = None,
+    ) -> int:
+        """Executa o programa bloco a bloco
+        Args:
+            compiler (BlockCompiler): compilador dos blocos do firmware
+            fast_forward (Optional[list], opcional): funções de avanço rápido indexadas pelo MPC.
+                Os inícios dos laços devem ser líderes no compilador
+            max_ticks (Optional[int], opcional): número máximo de passos. Os passos que não
+                completam um bloco são executados um a um
+        Retorna:
+            int: Número de passos (microinstruções executadas)
+        """
+        blocks = compiler.compile()
+        registers = self._regs._file
+        alu, bus, memory = self._alu, self._bus, self._memory
+        rb, rw, ww = memory.read_byte, memory.read_word, memory.write_word
+
+        ticks = 0
+        mpc = self._regs.MPC
+        if max_ticks is not None:
+            while block := blocks[mpc]:
+                if fast_forward is not None and (skip := fast_forward[mpc]):
+                    ticks += skip(registers, max_ticks - ticks)
+                fn, size = block
+                if ticks + size > max_ticks:
+                    break
+                mpc = fn(registers, alu, bus, rb, rw, ww)
+                ticks += size
+        elif fast_forward is None:
+            while block := blocks[mpc]:
+                fn, size = block
+                mpc = fn(registers, alu, bus, rb, rw, ww)
+                ticks += size
+        else:
+            while block := blocks[mpc]:
+                if skip := fast_forward[mpc]:
+                    ticks += skip(registers)
+                fn, size = block
+                mpc = fn(registers, alu, bus, rb, rw, ww)
+                ticks += size
+
+        self._regs.MPC = mpc
+        self._regs.MIR = self.firmware[mpc]
+        if max_ticks is not None:
+            while ticks < max_ticks and self._step():
+                ticks += 1
+        return ticks
+
+    def _run_native(self) -> int:
+        """Executa o programa traduzido, traduzindo-o caso ainda não tenha sido
+        ou caso a CPU não esteja no estado inicial da tradução
+        Retorna:
+            int: Número de passos (microinstruções executadas)
+        """
+        regs, alu = self._regs, self._alu
+        entry = (regs.MPC, regs.PC, regs.MBR, regs.MAR, alu.N, alu.Z)
+        if self._native is None or self._native.entry != entry:
+            self._native = Translator(self).translate()
+        return self._native.run(self)
+
     def _read_registers(self, regist_B: int, regist_A: int) -> None:
         """Lê os registros e armazena o valor nos barramentos A e B
         Args:
             regist_B (int): registro cujo valor será armazenado no barramento B
             regist_A (int): registro cujo valor será armazenado no barramento A
         """
-        self._bus.BUS_A = self._regs.get_reg(regist_A)
-        self._bus.BUS_B = self._regs.get_reg(regist_B)
+        registers = self._regs._file
+        self._bus.BUS_A = registers[regist_A]
+        self._bus.BUS_B = registers[regist_B]
 
     def _write_registers(self, register_bits: int) -> None:
         """Escreve o valor do registro dado no barramento C
         Args:
             register_bits (int): Bits correspondentes ao registro
         """
-        self._regs.write_reg(register_bits, self._bus.BUS_C)
+        self._regs._file[WRITE_SLOTS[register_bits]] = self._bus.BUS_C
 
     def _alu_operation(self, control_bits: int) -> None:
         """Executa a operação da ALU e guarda no barramento C
@@ -94,25 +516,6 @@ class CPU(CPUBase):
         elif mem_bits & 0b100:
             self._memory.write_word(self._regs.MAR, self._regs.MDR)
 
-    def _get_current_status(self) -> str:
-        return f"X: {self._regs.X} | Y: {self._regs.Y} | K: {self._regs.K}"
-
-    def _print_current_instruction(self, num: int) -> None:
-        """Exibe no prompt mensagens indicando qual a intrução atual da execução do programa"""
-        b = ("_").join(
-            [bin(inst)[2:] for inst in self._parse_instruction(self._regs.MIR)]
-        )
-        if not num:
-            print(f"| main ({self._regs.MPC}) -> {b} [{self._get_current_status()}]")
-            return
-        else:
-            for key, n in self._ops_dict.items():
-                if n == num:
-                    print(f"| {key}")
-                    break
-
-        print(f"\t({self._regs.MPC}) -> {b} [{self._get_current_status()}]")
-
     def _step(self) -> bool:
         """
         Executa cada passo
@@ -121,15 +524,12 @@ class CPU(CPUBase):
         """
         self._regs.MIR = self.firmware[self._regs.MPC]
 
-        if self.display_log:
-            self._print_current_instruction(self._regs.MPC)
-
         if self._regs.MIR == 0:
             return False
 
-        nxt, jam, alu, w_regs, mem, r_regsB, r_regsA = self._parse_instruction(
-            self._regs.MIR
-        )
+        nxt, jam, alu, w_regs, mem, r_regsB, r_regsA = self.control_store[
+            self._regs.MPC
+        ]
 
         self._read_registers(r_regsB, r_regsA)
         self._alu_operation(alu)
@@ -139,21 +539,6 @@ class CPU(CPUBase):
 
         return True
 
-    @staticmethod
-    def _parse_instruction(instruction: int) -> tuple:
-        return (
-            (instruction & 0b111111111_000_00_000000_0000000_000_000_000)
-            >> 27,  # next instruction
-            (instruction & 0b000000000_111_00_000000_0000000_000_000_000) >> 24,  # jam
-            (instruction & 0b000000000_000_11_111111_0000000_000_000_000) >> 16,  # alu
-            (instruction & 0b000000000_000_00_000000_1111111_000_000_000)
-            >> 9,  # w_regs
-            (instruction & 0b000000000_000_00_000000_0000000_111_000_000) >> 6,  # mem
-            (instruction & 0b000000000_000_00_000000_0000000_000_111_000)
-            >> 3,  # r_regsB
-            (instruction & 0b000000000_000_00_000000_0000000_000_000_111),  # r_regsA
-        )
-
     def __str__(self) -> str:
         output = {}
         idx = 0
@@ -1,22 +1,102 @@
 from array import array
 from typing import Callable, Optional
 
+from .cache import FirmwareTables, firmware_tables
+from .components import ALU
+
 
 class CPUBase:
+    # usados apenas enquanto o firmware é montado (ver _build)
+    _next_idx: int
+    _goto_idx: Optional[int]  # índice da operação de GOTO
+
     def __init__(self) -> None:
-        self.firmware = (
-            array("Q", [0]) * 512
-        )  #'Q' e não "L" porque temos mais de 32 bits em cada instrução
-        self._next_idx = 0
-        self._goto_idx: Optional[int] = None  # índice da operação de GOTO
+        # o firmware é montado uma única vez por processo (ou lido do cache em disco)
+        # e compartilhado entre todas as instâncias: não deve ser alterado
+        tables = self.tables()
+        self.firmware = tables.firmware
+        # firmware já decodificado: os campos de cada microinstrução, indexados pelo MPC
+        self.control_store: list[tuple] = tables.control_store
 
         # para o assembler:
         # armazena cada instrução e seu índice de início.
-        self._ops_dict: dict[str, int] = {}
+        self._ops_dict: dict[str, int] = tables.ops_dict
         # operações agrupadas pelo número de argumentos.
-        self._ops_args: dict[int, list[str]] = {}
-        self._ops_move: list[str] = []
-        self._control()  # adiciona as instruções
+        self._ops_args: dict[int, list[str]] = tables.ops_args
+        self._ops_move: list[str] = tables.ops_move
+        # início dos laços de microinstruções conhecidos e seus tipos (ver emulator/fastforward.py)
+        self._loops: dict[int, str] = tables.loops
+
+    @classmethod
+    def tables(cls) -> FirmwareTables:
+        """Firmware e tabelas de operações da classe (ver emulator/cache.py).
+        As subclasses que não redefinem _control (ex: CPU) usam as mesmas tabelas de CPUBase
+        """
+        owner: type[CPUBase] = next(
+            klass for klass in cls.__mro__ if "_control" in vars(klass)
+        )
+        return firmware_tables(
+            owner, owner._build, owner._parse_instruction, owner._validate
+        )
+
+    @staticmethod
+    def _validate(tables: FirmwareTables) -> None:
+        """Verifica as operações da ULA de todo o firmware (ver ALU.validate)
+        raises:
+            ValueError -> Operação inválida
+        """
+        for fields in tables.control_store:
+            if fields[2]:
+                ALU.validate(fields[2])
+
+    @classmethod
+    def _build(cls) -> FirmwareTables:
+        """Monta o firmware chamando todas as operações de _control"""
+        builder = cls.__new__(cls)
+        builder.firmware = (
+            array("Q", [0]) * 512
+        )  #'Q' e não "L" porque temos mais de 32 bits em cada instrução
+        builder._next_idx = 0
+        builder._goto_idx = None  # índice da operação de GOTO
+        builder._ops_dict = {}
+        builder._ops_args = {}
+        builder._ops_move = []
+        builder._loops = {}
+        builder._control()  # adiciona as instruções
+
+        return FirmwareTables(
+            builder.firmware,
+            builder._decode_firmware(),
+            builder._ops_dict,
+            builder._ops_args,
+            builder._ops_move,
+            builder._loops,
+        )
+
+    @staticmethod
+    def _parse_instruction(instruction: int) -> tuple:
+        return (
+            (instruction & 0b111111111_000_00_000000_0000000_000_000_000)
+            >> 27,  # next instruction
+            (instruction & 0b000000000_111_00_000000_0000000_000_000_000) >> 24,  # jam
+            (instruction & 0b000000000_000_11_111111_0000000_000_000_000) >> 16,  # alu
+            (instruction & 0b000000000_000_00_000000_1111111_000_000_000)
+            >> 9,  # w_regs
+            (instruction & 0b000000000_000_00_000000_0000000_111_000_000) >> 6,  # mem
+            (instruction & 0b000000000_000_00_000000_0000000_000_111_000)
+            >> 3,  # r_regsB
+            (instruction & 0b000000000_000_00_000000_0000000_000_000_111),  # r_regsA
+        )
+
+    def _decode_firmware(self) -> list[tuple]:
+        """Decodifica todo o firmware uma única vez.
+        O firmware não muda durante a execução, então os campos de cada microinstrução
+        podem ser separados antecipadamente
+
+        Returns:
+            list[tuple]: campos (next, jam, alu, w_regs, mem, r_regsB, r_regsA) de cada posição do firmware
+        """
+        return [self._parse_instruction(instruction) for instruction in self.firmware]
 
     def _make_instruction(
         self,
@@ -344,6 +424,7 @@ class CPUBase:
         # A cada vez que somar 2*X em H, diminuirá 1 de Y/2 e verificará se este é 0
         # Repete o processo até ser 0
         mark = self._next_idx
+        self._loops[mark] = "accumulate"  # laço H <- H + X; Y <- Y - 1
         # 31: H<- H + X; GOTO next
         self.firmware[self._next_idx - 1] = self._make_instruction(
             0b000_00_111100_0000010_000_011_101
@@ -402,6 +483,7 @@ class CPUBase:
         # A cada vez que somar X em H, diminuirá 1 de Y e verificará se este é 0
         # Repete o processo até ser 0
         mark = self._next_idx
+        self._loops[mark] = "accumulate"  # laço H <- H + X; Y <- Y - 1
         # 31: H<- H + X; GOTO next
         self.firmware[self._next_idx - 1] = self._make_instruction(
             0b000_00_111100_0000010_000_011_101
@@ -449,6 +531,7 @@ class CPUBase:
 
         # Zera K
         start = self._next_idx  # onde inicia cada divisão
+        self._loops[start] = "div_round"  # cada subtração de Y em X
         # 37: K<-0; GOTO next
         self.firmware[self._next_idx - 1] = self._make_instruction(
             0b000_00_010000_0000001_000_000_000
@@ -468,6 +551,7 @@ class CPUBase:
 
         # Incrementa K em 1
         inc_K = self._next_idx
+        self._loops[inc_K] = "count"  # laço K <- K + 1 até alcançar Y ou X
         # 38 inc_K: K<-K+1; GOTO next
         self.firmware[self._next_idx - 1] = self._make_instruction(
             0b000_00_111001_0000001_000_000_110
@@ -517,6 +601,7 @@ class CPUBase:
 
         # Zera K
         start = self._next_idx  # onde inicia cada divisão
+        self._loops[start] = "divis_round"  # cada subtração de Y em X
         # 37: K<-0; GOTO next
         self.firmware[self._next_idx - 1] = self._make_instruction(
             0b000_00_010000_0000001_000_000_000
@@ -536,6 +621,7 @@ class CPUBase:
 
         # Incrementa K em 1
         inc_K = self._next_idx
+        self._loops[inc_K] = "count"  # laço K <- K + 1 até alcançar Y ou X
         # 38 inc_K: K<-K+1; GOTO next
         self.firmware[self._next_idx - 1] = self._make_instruction(
             0b000_00_111001_0000001_000_000_110
@@ -837,6 +923,7 @@ class CPUBase:
 
         # --- Subtrair um de cada. Quem acabar primeiro é o menor
         loop = self._next_idx
+        self._loops[loop] = "countdown"  # laço Y <- Y - 1; X <- X - 1
         # Y <- Y-1; if ALU = 0 GOTO greater; ELSE GOTO next
         self.firmware[self._next_idx - 1] = self._make_instruction(
             0b001_00_110110_0000100_000_100_000
@@ -0,0 +1,155 @@
+from typing import Callable, Optional
+
+from .components.registers import SLOTS
+
+_X, _Y, _H, _K = SLOTS["X"], SLOTS["Y"], SLOTS["H"], SLOTS["K"]
+
+
+# Campos esperados (next, jam, alu, w_regs, mem, r_regsB, r_regsA) de cada laço,
+# a partir da posição inicial 'head'. Um laço só é acelerado se o firmware for exatamente esse
+def _accumulate_fields(head: int) -> dict[int, tuple]:
+    return {
+        head: (head + 1, 0b000, 0b111100, 0b0000010, 0, 3, 5),  # H <- X + H
+        head + 1: (head + 2, 0b000, 0b110110, 0b0000100, 0, 4, 0),  # Y <- Y - 1
+        head + 2: (head, 0b001, 0b010100, 0, 0, 4, 0),  # IF Y = 0
+    }
+
+
+def _count_fields(head: int) -> dict[int, tuple]:
+    return {
+        head: (head + 1, 0b000, 0b111001, 0b0000001, 0, 0, 6),  # K <- K + 1
+        head + 1: (head + 2, 0b001, 0b111111, 0, 0, 4, 6),  # IF Y - K = 0
+        head + 2: (head, 0b001, 0b111111, 0, 0, 3, 6),  # IF X - K = 0
+    }
+
+
+def _round_fields(head: int) -> dict[int, tuple]:
+    return {
+        head: (head + 1, 0b000, 0b010000, 0b0000001, 0, 0, 0),  # K <- 0
+        head + 1: (head + 2, 0b001, 0b010100, 0, 0, 3, 0),  # IF X = 0
+        **_count_fields(head + 2),
+    }
+
+
+def _div_round_fields(head: int) -> dict[int, tuple]:
+    return {
+        **_round_fields(head),
+        (head + 4) | 256: (head + 6, 0b000, 0b111001, 0b0000010, 0, 5, 0),  # H <- 1
+        head + 6: (head, 0b000, 0b111111, 0b0001000, 0, 3, 4),  # X <- X - Y
+    }
+
+
+def _divis_round_fields(head: int) -> dict[int, tuple]:
+    return {
+        **_round_fields(head),
+        (head + 4) | 256: (head, 0b000, 0b111111, 0b0001000, 0, 3, 4),  # X <- X - Y
+    }
+
+
+def _countdown_fields(head: int) -> dict[int, tuple]:
+    return {
+        head: (head + 1, 0b001, 0b110110, 0b0000100, 0, 4, 0),  # Y <- Y - 1; IF Y = 0
+        head + 1: (head + 2, 0b001, 0b110110, 0b0001000, 0, 3, 0),  # X <- X - 1; IF X = 0
+        head + 2: (head, 0b000, 0, 0, 0, 0, 0),  # GOTO head
+    }
+
+
+def _bound(skip: int, ticks: int, limit: Optional[int]) -> int:
+    """Limita as voltas puladas para não passar de 'limit' passos ('ticks' passos por volta)"""
+    return skip if limit is None else min(skip, limit // ticks)
+
+
+def _accumulate(f: list, limit: Optional[int] = None) -> int:
+    """H <- H + X; Y <- Y - 1 até Y ser 0 (3 passos por volta)"""
+    y = f[_Y]
+    if y < 2:
+        return 0
+    skip = _bound(y - 1, 3, limit)
+    if not skip:
+        return 0
+    f[_H] += skip * f[_X]
+    f[_Y] = y - skip
+    return 3 * skip
+
+
+def _count(f: list, limit: Optional[int] = None) -> int:
+    """K <- K + 1 até K alcançar Y ou X (3 passos por volta)"""
+    k = f[_K]
+    ends = [value - k for value in (f[_Y], f[_X]) if value > k]
+    if not ends or min(ends) < 2:
+        return 0
+    skip = _bound(min(ends) - 1, 3, limit)
+    f[_K] = k + skip
+    return 3 * skip
+
+
+def _countdown(f: list, limit: Optional[int] = None) -> int:
+    """Y <- Y - 1; X <- X - 1 até Y ou X ser 0 (3 passos por volta)"""
+    ends = [value for value in (f[_Y], f[_X]) if value > 0]
+    if not ends or min(ends) < 2:
+        return 0
+    skip = _bound(min(ends) - 1, 3, limit)
+    f[_Y] -= skip
+    f[_X] -= skip
+    return 3 * skip
+
+
+def _div_round(f: list, limit: Optional[int] = None) -> int:
+    """Cada volta de divXY com X >= Y: H <- 1; X <- X - Y (3Y + 3 passos)"""
+    x, y = f[_X], f[_Y]
+    if x <= 0 or y <= 0 or x // y < 2:
+        return 0
+    skip = _bound(x // y - 1, 3 * y + 3, limit)
+    if not skip:
+        return 0
+    f[_X] = x - skip * y
+    f[_H] = 1
+    f[_K] = y
+    return skip * (3 * y + 3)
+
+
+def _divis_round(f: list, limit: Optional[int] = None) -> int:
+    """Cada volta de divisXY com X >= Y: X <- X - Y (3Y + 2 passos)"""
+    x, y = f[_X], f[_Y]
+    if x <= 0 or y <= 0 or x // y < 2:
+        return 0
+    skip = _bound(x // y - 1, 3 * y + 2, limit)
+    if not skip:
+        return 0
+    f[_X] = x - skip * y
+    f[_K] = y
+    return skip * (3 * y + 2)
+
+
+# tipo do laço -> (campos esperados, função que avança o laço)
+LOOPS: dict[str, tuple] = {
+    "accumulate": (_accumulate_fields, _accumulate),
+    "count": (_count_fields, _count),
+    "countdown": (_countdown_fields, _countdown),
+    "div_round": (_div_round_fields, _div_round),
+    "divis_round": (_divis_round_fields, _divis_round),
+}
+
+
+def fast_forward_table(
+    control_store: list, loops: dict[int, str]
+) -> list[Optional[Callable[..., int]]]:
+    """Monta a tabela de avanço rápido indexada pelo MPC.
+
+    Ao chegar no início de um laço conhecido, a função da tabela calcula diretamente o
+    estado dos registros após todas as voltas menos a última, e retorna quantos passos
+    foram pulados. A última volta é executada normalmente, então flags, barramentos
+    e o número de passos ficam idênticos à execução passo a passo
+    Args:
+        control_store (list): firmware decodificado
+        loops (dict[int, str]): início de cada laço e seu tipo (CPUBase._loops)
+    Returns:
+        list: função de avanço de cada posição ou None. A função recebe os registros
+            e, opcionalmente, o número máximo de passos a pular
+    """
+    table: list[Optional[Callable[..., int]]] = [None] * len(control_store)
+    for head, kind in loops.items():
+        fields, handler = LOOPS[kind]
+        if all(control_store[mpc] == expected for mpc, expected in fields(head).items()):
+            table[head] = handler
+    return table
@@ -0,0 +1,155 @@
+from itertools import accumulate
+from typing import Optional
+
+from .assembler import Assembler
+
+
+class IncrementalAssembler(Assembler):
+    """Assembler que guarda a montagem anterior para montar novamente após edições.
+
+    Cada execute() compara o código fonte com o da montagem anterior e converte para
+    binário apenas as linhas entre a primeira e a última linha alterada. As demais
+    linhas mantêm seus bytes, e apenas as referências a nomes que mudaram de byte são
+    preenchidas novamente. Ex:
+
+        assembler = IncrementalAssembler("questao4.asm")
+        assembler.execute()
+        ...  # edita questao4.asm
+        assembler.execute()  # converte apenas as linhas editadas
+    """
+
+    def __init__(self, source: str, output: Optional[str] = "program.bin") -> None:
+        """
+        Args:
+            source (str): arquivo .asm
+            output (Optional[str], opcional): arquivo .bin gerado. Caso None, a imagem é
+                apenas retornada por execute. Padrão é "program.bin"
+        """
+        super().__init__(source, output, cache=False)
+        self.reencoded = 0  # linhas convertidas na última montagem
+        self.refixed = 0  # referências preenchidas na última montagem
+        self._clear()
+
+    def _clear(self) -> None:
+        """Descarta a montagem anterior: a próxima será completa"""
+        self.names = {}
+        self._source: list[str] = []  # linhas do código fonte
+        # para cada linha do código fonte (linhas vazias têm 0 bytes):
+        self._sizes: list[int] = []  # número de bytes
+        self._labels: list[Optional[str]] = []  # marcador definido pela linha
+        self._refs: list[list] = []  # referências (posição na linha, nome, palavra)
+        self._starts: list[int] = [1]  # byte de início (e o fim da última linha)
+        self._image = bytearray(1)
+        self._used: dict[str, int] = {}  # nomes referenciados -> número de referências
+
+    def execute(self) -> bytes:
+        """Monta o programa, aproveitando a montagem anterior
+        Returns:
+            bytes: imagem do programa (conteúdo do arquivo .bin)
+        """
+        with open(self.source_file, "r") as src:
+            lines = src.readlines()
+
+        try:
+            self._update(lines)
+        except (SyntaxError, ValueError):
+            self._clear()
+            raise
+
+        image = bytes(self._image)
+        if self.output_file is not None:
+            self._write_file(image)
+        return image
+
+    def _changed(self, lines: list[str]) -> tuple[int, int, int]:
+        """Trecho alterado: primeira linha, fim no código anterior e fim no novo"""
+        old = self._source
+        size = min(len(old), len(lines))
+        first = 0
+        while first < size and old[first] == lines[first]:
+            first += 1
+        last = 0
+        while last < size - first and old[-1 - last] == lines[-1 - last]:
+            last += 1
+        return first, len(old) - last, len(lines) - last
+
+    def _update(self, lines: list[str]) -> None:
+        first, old_end, new_end = self._changed(lines)
+        self.reencoded = new_end - first
+        self.refixed = 0
+        if first == old_end == new_end:
+            return
+
+        sizes, labels, refs = [], [], []
+        data = bytearray()
+        for text in lines[first:new_end]:
+            label: Optional[str] = None
+            line_bin = b""
+            line_refs: list[tuple[int, str, bool]] = []
+            if tokens := self._split(text):
+                label, line_bin, line_refs = self._encode_line(tokens)
+            sizes.append(len(line_bin))
+            labels.append(label)
+            refs.append(line_refs)
+            data += line_bin
+
+        start, end = self._starts[first], self._starts[old_end]
+        moved = len(data) != end - start  # as linhas seguintes mudaram de byte
+        labels_changed = any(self._labels[first:old_end]) or any(labels)
+
+        for line_refs in self._refs[first:old_end]:
+            self._count(line_refs, -1)
+        for line_refs in refs:
+            self._count(line_refs, 1)
+
+        self._image[start:end] = data
+        self._source[first:old_end] = lines[first:new_end]
+        self._labels[first:old_end] = labels
+        self._refs[first:old_end] = refs
+        if old_end - first != new_end - first or self._sizes[first:old_end] != sizes:
+            self._sizes[first:old_end] = sizes
+            self._starts = list(accumulate(self._sizes, initial=1))
+
+        # nomes referenciados que mudaram de byte (ou foram criados ou removidos)
+        changed: set[str] = set()
+        if moved or labels_changed:
+            names = {
+                name: self._starts[lineno]
+                for lineno, name in enumerate(self._labels)
+                if name is not None
+            }
+            changed = {
+                name for name in self._used if names.get(name) != self.names.get(name)
+            }
+            self.names = names
+
+        for lineno in range(first, new_end):
+            if self._refs[lineno]:
+                self._fix(lineno, self._refs[lineno])
+        if changed:
+            for lineno, line_refs in enumerate(self._refs):
+                if first <= lineno < new_end or not line_refs:
+                    continue
+                self._fix(lineno, [ref for ref in line_refs if ref[1] in changed])
+
+    def _count(self, refs: list, step: int) -> None:
+        """Atualiza o número de referências de cada nome"""
+        for _, name, _ in refs:
+            count = self._used.get(name, 0) + step
+            if count:
+                self._used[name] = count
+            else:
+                del self._used[name]
+
+    def _fix(self, lineno: int, refs: list) -> None:
+        """Preenche na imagem os bytes dos nomes referenciados pela linha
+        raises:
+            ValueError -> Nome não definido no código fonte
+        """
+        start = self._starts[lineno]
+        for offset, name, word in refs:
+            if not self._is_name(name):
+                raise ValueError("Invalid input ", [name])
+            byte = self.names[name]
+            self._image[start + offset] = byte // 4 if word else byte
+            self.refixed += 1
@@ -0,0 +1,117 @@
+from typing import Iterator, Optional, TextIO
+
+from .components.registers import SLOTS
+
+# campos de cada registro do log, em sequência na lista 'records'
+RECORD_FIELDS = ("MPC", "X", "Y", "K")
+RECORD_SIZE = len(RECORD_FIELDS)
+LOGGED_SLOTS = tuple(SLOTS[name] for name in RECORD_FIELDS[1:])
+
+
+def macro_index(control_store: list, ops_dict: dict[str, int]) -> list[str]:
+    """Nome da instrução (macro) a que pertence cada posição do firmware.
+
+    Percorre as microinstruções alcançáveis a partir do início de cada instrução,
+    sem entrar no main (0) nem no início de outra instrução
+    Args:
+        control_store (list): firmware decodificado
+        ops_dict (dict[str, int]): instrução -> posição de início (CPUBase._ops_dict)
+    Returns:
+        list[str]: nome da instrução de cada MPC ("" para posições não alcançáveis)
+    """
+    names = [""] * len(control_store)
+    names[0] = "main"
+    starts = {start: name for name, start in reversed(ops_dict.items())}
+    for start, name in sorted(starts.items()):
+        pending = [start]
+        while pending:
+            mpc = pending.pop()
+            if names[mpc]:
+                continue
+            names[mpc] = name
+            nxt, jam = control_store[mpc][:2]
+            successors = [nxt]
+            if jam & 0b011:
+                successors.append(nxt | 256)
+            pending += [
+                target
+                for target in successors
+                if target and target not in starts and not names[target]
+            ]
+    return names
+
+
+class ExecutionLog:
+    """Log da execução passo a passo (CPU(log=True)).
+
+    Cada passo é guardado como inteiros em sequência (MPC, X, Y, K) em 'records'
+    (os registros não têm limite de tamanho, então não cabem em um array de tamanho fixo).
+    O texto só é montado ao ser exibido: a cada 'buffer' passos caso haja um 'stream',
+    ou quando pedido por lines()
+    """
+
+    def __init__(
+        self,
+        cpu_base,
+        stream: Optional[TextIO] = None,
+        buffer: int = 4096,
+    ) -> None:
+        """
+        Args:
+            cpu_base (CPUBase): firmware da CPU
+            stream (Optional[TextIO], opcional): destino do texto (ex: sys.stdout).
+                Caso None, os registros são apenas guardados. Padrão é None
+            buffer (int, opcional): passos guardados antes de escrever no stream. Padrão é 4096
+        """
+        self.records: list[int] = []
+        self.stream = stream
+        self.buffer = buffer
+        self._control_store = cpu_base.control_store
+        self.macros = macro_index(cpu_base.control_store, cpu_base._ops_dict)
+        # início de cada instrução (o primeiro nome, como no dicionário de instruções)
+        self._starts = {
+            start: name for name, start in reversed(cpu_base._ops_dict.items())
+        }
+        self._fields_text: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.records) // RECORD_SIZE
+
+    def entries(self) -> Iterator[tuple]:
+        """Passos guardados como (instrução, MPC, X, Y, K)"""
+        records, macros = self.records, self.macros
+        for pos in range(0, len(records), RECORD_SIZE):
+            mpc = records[pos]
+            yield (macros[mpc], *records[pos : pos + RECORD_SIZE])
+
+    def _fields(self, mpc: int) -> str:
+        """Campos da microinstrução em binário, separados por '_'"""
+        if mpc not in self._fields_text:
+            fields = self._control_store[mpc]
+            self._fields_text[mpc] = "_".join(bin(field)[2:] for field in fields)
+        return self._fields_text[mpc]
+
+    def lines(self) -> Iterator[str]:
+        """Texto dos passos guardados, no formato exibido pela CPU"""
+        records = self.records
+        for pos in range(0, len(records), RECORD_SIZE):
+            mpc, x, y, k = records[pos : pos + RECORD_SIZE]
+            status = f"X: {x} | Y: {y} | K: {k}"
+            if not mpc:
+                yield f"| main ({mpc}) -> {self._fields(mpc)} [{status}]"
+                continue
+            if mpc in self._starts:
+                yield f"| {self._starts[mpc]}"
+            yield f"\t({mpc}) -> {self._fields(mpc)} [{status}]"
+
+    def flush(self) -> None:
+        """Escreve os passos guardados no stream e os descarta. Sem stream, não faz nada"""
+        if self.stream is None:
+            return
+        for line in self.lines():
+            self.stream.write(line + "\n")
+        self.stream.flush()
+        self.records.clear()
+
+    def __str__(self) -> str:
+        return "\n".join(self.lines())
@@ -1,12 +1,87 @@
+import struct
+import sys
 from array import array
+from typing import Iterator
+
+# 4 bytes per word: 'I' on all common platforms ('L' has 8 on 64-bit Linux), so the
+# memory can be viewed as bytes in the same layout as the program image
+WORD_TYPE = "I" if array("I").itemsize == 4 else "L"
+# words are little-endian (as the assembler writes them): on big-endian hosts
+# byte n of the memory is at position n ^ 3 of the byte view
+_BYTE_SWAP = 0b11 if sys.byteorder == "big" else 0
+
+PAGE_BITS = 10  # 1 page = 1024 words (4Kb)
+PAGE_WORDS = 1 << PAGE_BITS
+WORDS = 1024 * 1024 // 4  # 1Mb | 262.144 words
+PAGES = WORDS >> PAGE_BITS
 
 
 class Memory:
     """Emulates a memory (1Mb storage and 32 bits each word)"""
 
     def __init__(self) -> None:
-        self._memory = array("L", [0]) * (1024 * 1024 // 4)  # 1Mb | 262.144 words
+        self._memory = array(WORD_TYPE, [0]) * WORDS  # 1Mb | 262.144 words
         # 1 word = 32 bits (4 bytes)
+        self._dirty: set[int] = set()  # pages written since the last checkpoint
+        self._saved: dict[int, array] = {}  # contents of the non-zero pages at the checkpoint
+        self._zero_page = array(WORD_TYPE, [0]) * PAGE_WORDS
+        # the same storage, one byte per position (used by read_byte and write_byte)
+        self._bytes = memoryview(self._memory).cast("B")
+
+    def load(self, data: bytes) -> None:
+        """Copies a program image into the memory, starting at byte 0.
+        Bytes are stored little-endian in each word, as write_byte does
+        Args:
+            data (bytes): image contents
+        """
+        size = len(data)
+        if size > len(self._memory) * 4:
+            raise ValueError("Image does not fit in memory", size)
+        if not size:
+            return
+
+        if not _BYTE_SWAP:
+            # the backing buffer already has the image layout: a single copy
+            self._bytes[:size] = data
+        else:
+            # big-endian hosts: whole words are converted at once, the rest byte by byte
+            words = size >> 2
+            self._memory[:words] = array(WORD_TYPE, struct.unpack_from(f"<{words}I", data))
+            for byte in range(words << 2, size):
+                self.write_byte(byte, data[byte])
+
+        last_page = ((size - 1) >> 2) >> PAGE_BITS
+        self._dirty.update(range(last_page + 1))
+
+    def fork(self) -> "Memory":
+        """Returns an independent copy of the memory (the whole 1Mb is copied)"""
+        clone = Memory.__new__(Memory)
+        clone._memory = array(WORD_TYPE, self._memory)
+        clone._dirty = set(self._dirty)
+        clone._saved = dict(self._saved)  # saved pages are never written, only copied from
+        clone._zero_page = self._zero_page
+        clone._bytes = memoryview(clone._memory).cast("B")
+        return clone
+
+    def checkpoint(self) -> None:
+        """Saves the current contents of the memory, to be restored later by restore().
+        Only the pages written since the previous checkpoint are copied
+        """
+        for page in self._dirty:
+            start = page << PAGE_BITS
+            self._saved[page] = self._memory[start : start + PAGE_WORDS]
+        self._dirty.clear()
+
+    def restore(self) -> None:
+        """Restores the contents saved by the last checkpoint.
+        Only the pages written since then are copied back
+        """
+        for page in self._dirty:
+            start = page << PAGE_BITS
+            self._memory[start : start + PAGE_WORDS] = self._saved.get(
+                page, self._zero_page
+            )
+        self._dirty.clear()
 
     @staticmethod
     def _normalize_pos(pos: int, add_num: int = 0, add_bits: int = 0) -> int:
@@ -31,14 +106,148 @@ class Memory:
         pos = self._normalize_pos(memory_address)
         value = value & 0xFFFFFFFF
         self._memory[pos] = value
+        self._dirty.add(pos >> PAGE_BITS)
+
+    def read_byte(self, byte: int) -> int:
+        """Reads a byte from the memory
+        Args:
+            byte (int): byte to read
+        Returns:
+            int: value stored in that byte
+        """
+        return self._bytes[(byte & 0x1FFFFF) ^ _BYTE_SWAP]
+
+    def write_byte(self, byte: int, value: int) -> None:
+        """Writes a value into a byte from the memory
+        Args:
+            byte (int): byte to which the value will be written
+            value (int): value to write
+        """
+        pos = byte & 0x1FFFFF
+        self._bytes[pos ^ _BYTE_SWAP] = value & 0xFF
+        self._dirty.add(pos >> (PAGE_BITS + 2))
+
+    def items(self) -> Iterator[tuple[int, int]]:
+        """Non-zero words and their addresses, in address order"""
+        for idx, data in enumerate(self._memory):
+            if data:
+                yield idx, data
+
+    def __str__(self) -> str:
+        return str({str(idx): data for idx, data in self.items()})
+
+
+# shared by every PagedMemory for the pages that were never written. Never modified
+_ZERO_PAGE = array(WORD_TYPE, [0]) * PAGE_WORDS
+_ZERO_BYTES = memoryview(_ZERO_PAGE).cast("B")
+
 
-    def _get_complete_word_by_byte(self, byte: int) -> tuple:
-        pos = self._normalize_pos(byte, 2, 3)
-        addr_word = pos >> 2  # divides 'pos' by 4 (32 bits - 4 bytes - word's size)
-        word_stored = self._memory[addr_word]
-        end_byte = (pos & 0b11) << 3  # remainder of the division converted to bytes
+class PagedMemory:
+    """Emulates the same memory as Memory, allocating 4Kb pages only when written.
 
-        return word_stored, end_byte, addr_word
+    Pages never written are read from a single shared zero page, so a program using a
+    few dozen words costs a few Kb instead of 1Mb. Useful when many CPUs are kept in
+    the same process: CPU(memory=PagedMemory())
+
+    Pages are copy-on-write: fork(), checkpoint() and restore() share pages instead of
+    copying them, and a shared page is only copied on its next write
+    """
+
+    def __init__(self) -> None:
+        # every position starts at the shared zero page (a list index also rejects
+        # addresses outside the 1Mb, as in Memory)
+        self._pages: list[array] = [_ZERO_PAGE] * PAGES
+        self._byte_pages: list[memoryview] = [_ZERO_BYTES] * PAGES
+        self._owned: set[int] = set()  # pages not shared with anything else (writable)
+        self._dirty: set[int] = set()  # pages written since the last checkpoint
+        self._saved: dict[int, array] = {}  # pages at the checkpoint (shared, never written)
+
+    def _allocate(self, page: int) -> array:
+        """Gives a page its own storage on its first write after being shared"""
+        if page not in self._owned:
+            words = array(WORD_TYPE, self._pages[page])
+            self._pages[page] = words
+            self._byte_pages[page] = memoryview(words).cast("B")
+            self._owned.add(page)
+        self._dirty.add(page)
+        return self._pages[page]
+
+    def _share(self, page: int, words: array) -> None:
+        self._pages[page] = words
+        self._byte_pages[page] = memoryview(words).cast("B")
+        self._owned.discard(page)
+
+    def fork(self) -> "PagedMemory":
+        """Returns a copy of the memory. Both share every page until they write to it"""
+        clone = PagedMemory.__new__(PagedMemory)
+        clone._pages = list(self._pages)
+        clone._byte_pages = list(self._byte_pages)
+        clone._owned = set()
+        clone._dirty = set(self._dirty)
+        clone._saved = dict(self._saved)
+        self._owned.clear()
+        return clone
+
+    @property
+    def allocated_pages(self) -> int:
+        """Number of pages with their own storage"""
+        return sum(words is not _ZERO_PAGE for words in self._pages)
+
+    def load(self, data: bytes) -> None:
+        """Copies a program image into the memory, starting at byte 0
+        Args:
+            data (bytes): image contents
+        """
+        size = len(data)
+        if size > WORDS * 4:
+            raise ValueError("Image does not fit in memory", size)
+
+        page_bytes = PAGE_WORDS * 4
+        for start in range(0, size, page_bytes):
+            page = start // page_bytes
+            chunk = data[start : start + page_bytes]
+            self._allocate(page)
+            if not _BYTE_SWAP:
+                self._byte_pages[page][: len(chunk)] = chunk
+            else:
+                for offset, byte in enumerate(chunk):
+                    self._byte_pages[page][offset ^ _BYTE_SWAP] = byte
+
+    def checkpoint(self) -> None:
+        """Saves the current contents of the memory, to be restored later by restore().
+        The pages written since the previous checkpoint become shared with the saved copy
+        """
+        for page in self._dirty:
+            self._saved[page] = self._pages[page]
+            self._owned.discard(page)
+        self._dirty.clear()
+
+    def restore(self) -> None:
+        """Restores the contents saved by the last checkpoint.
+        Pages written since then go back to the saved (or zero) page, without copies
+        """
+        for page in self._dirty:
+            self._share(page, self._saved.get(page, _ZERO_PAGE))
+        self._dirty.clear()
+
+    def read_word(self, memory_address: int) -> int:
+        """Reads the words located at the given memory address
+        Args:
+            memory_address (int): word's address
+        Returns:
+            int: word
+        """
+        pos = memory_address & 0x7FFFF
+        return self._pages[pos >> PAGE_BITS][pos & (PAGE_WORDS - 1)]
+
+    def write_word(self, memory_address: int, value: int) -> None:
+        """Writes the given word to the given memory address
+        Args:
+            memory_address (int): address to which the word will be written
+            value (int): value to write
+        """
+        pos = memory_address & 0x7FFFF
+        self._allocate(pos >> PAGE_BITS)[pos & (PAGE_WORDS - 1)] = value & 0xFFFFFFFF
 
     def read_byte(self, byte: int) -> int:
         """Reads a byte from the memory
@@ -47,10 +256,8 @@ class Memory:
         Returns:
             int: value stored in that byte
         """
-        word_stored, end_byte, _ = self._get_complete_word_by_byte(byte)
-        val_byte = word_stored >> end_byte  # removes all bits before the expected byte
-
-        return val_byte & 0xFF  # turns all unexpected bits into 0
+        pos = byte & 0x1FFFFF
+        return self._byte_pages[pos >> (PAGE_BITS + 2)][(pos & 0xFFF) ^ _BYTE_SWAP]
 
     def write_byte(self, byte: int, value: int) -> None:
         """Writes a value into a byte from the memory
@@ -58,22 +265,19 @@ class Memory:
             byte (int): byte to which the value will be written
             value (int): value to write
         """
-        value &= 0xFF  # prepares the value
-        word_stored, end_byte, addr_word = self._get_complete_word_by_byte(byte)
-
-        # mask: turns into 0 all positions to be changed
-        mask = ~(0xFF << end_byte)
-        word_stored &= mask  # applies the mask
+        pos = byte & 0x1FFFFF
+        page = pos >> (PAGE_BITS + 2)
+        self._allocate(page)
+        self._byte_pages[page][(pos & 0xFFF) ^ _BYTE_SWAP] = value & 0xFF
 
-        # produces and stores the new value
-        self._memory[addr_word] = word_stored | (value << end_byte)
+    def items(self) -> Iterator[tuple[int, int]]:
+        """Non-zero words and their addresses, in address order (only allocated pages)"""
+        for page, words in enumerate(self._pages):
+            if words is _ZERO_PAGE:
+                continue
+            for idx, data in enumerate(words, page << PAGE_BITS):
+                if data:
+                    yield idx, data
 
     def __str__(self) -> str:
-        output = {}
-        idx = 0
-        for data in self._memory:
-            if data:
-                output[str(idx)] = data
-            idx += 1
-
-        return str(output)
+        return str({str(idx): data for idx, data in self.items()})
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .cpu import CPU
+
+
+class CPUPool:
+    """Reaproveita CPUs com uma imagem já carregada.
+
+    Criar uma CPU monta todo o firmware e aloca 1Mb de memória; para programas curtos
+    isso custa mais que a própria execução. As CPUs devolvidas ao pool são
+    restauradas com CPU.reset e entregues novamente sem recarregar a imagem
+    """
+
+    def __init__(
+        self, image: bytes, names: Optional[dict[str, int]] = None, size: int = 8
+    ) -> None:
+        """
+        Args:
+            image (bytes): imagem do programa (conteúdo do program.bin)
+            names (Optional[dict[str, int]], opcional): nomes do programa (Assembler.names)
+            size (int, opcional): número máximo de CPUs guardadas no pool. Padrão é 8
+        """
+        self.image = bytes(image)
+        self.names = dict(names or {})
+        self.size = size
+        self._idle: list[CPU] = []
+
+    def acquire(self) -> CPU:
+        """Retorna uma CPU com a imagem carregada e no estado inicial"""
+        if self._idle:
+            return self._idle.pop()
+        cpu = CPU()
+        cpu.load_image(self.image, self.names)
+        return cpu
+
+    def release(self, cpu: CPU) -> None:
+        """Devolve uma CPU obtida por acquire ao pool"""
+        if len(self._idle) < self.size:
+            cpu.reset()
+            self._idle.append(cpu)
+
+    @contextmanager
+    def cpu(self) -> Iterator[CPU]:
+        """Empresta uma CPU durante o bloco 'with' (ex: with pool.cpu() as cpu: ...)"""
+        cpu = self.acquire()
+        try:
+            yield cpu
+        finally:
+            self.release(cpu)
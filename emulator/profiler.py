@@ -0,0 +1,114 @@
+from bisect import bisect_right
+from typing import Optional
+
+from .log import macro_index
+
+_MPC_BITS = 9  # o firmware tem 512 posições
+
+
+class Profile:
+    """Passos de uma execução agrupados por instrução (macro) e endereço do programa.
+
+    Cada passo é atribuído à microinstrução executada (MPC) e ao endereço (PC) do
+    opcode da instrução em execução. Os passos do main (busca do opcode) ficam com a
+    instrução buscada. Instruções como goto e jz buscam o próximo opcode e desviam
+    para ele sem passar pelo main (GOTO MBR), então também terminam a instrução.
+    Usado por CPU.execute(profile=...)
+    """
+
+    def __init__(self, cpu_base, names: Optional[dict[str, int]] = None) -> None:
+        """
+        Args:
+            cpu_base (CPUBase): firmware da CPU
+            names (Optional[dict[str, int]], opcional): nomes do programa (Assembler.names),
+                usados para mostrar o rótulo de cada endereço
+        """
+        self.macros = macro_index(cpu_base.control_store, cpu_base._ops_dict)
+        # microinstruções (fora o main) que desviam para o próximo opcode (JAM = MBR)
+        self.dispatches = [
+            bool(mpc and fields[1] & 0b100)
+            for mpc, fields in enumerate(cpu_base.control_store)
+        ]
+        # (endereço << 9) | MPC -> passos
+        self.counts: dict[int, int] = {}
+        labels = sorted((byte, name) for name, byte in (names or {}).items())
+        self._label_bytes = [byte for byte, _ in labels]
+        self._label_names = [name for _, name in labels]
+
+    @property
+    def ticks(self) -> int:
+        return sum(self.counts.values())
+
+    def label(self, address: int) -> str:
+        """Rótulo mais próximo antes do endereço (ex: 'loop+3')"""
+        pos = bisect_right(self._label_bytes, address) - 1
+        if pos < 0:
+            return str(address)
+        offset = address - self._label_bytes[pos]
+        name = self._label_names[pos]
+        return f"{name}+{offset}" if offset else name
+
+    def _entries(self):
+        mask = (1 << _MPC_BITS) - 1
+        for key, ticks in self.counts.items():
+            mpc = key & mask
+            yield key >> _MPC_BITS, mpc, self.macros[mpc] or str(mpc), ticks
+
+    def by_macro(self) -> list[tuple[str, int]]:
+        """Passos de cada instrução, da mais custosa para a menos"""
+        totals: dict[str, int] = {}
+        for _, _, macro, ticks in self._entries():
+            totals[macro] = totals.get(macro, 0) + ticks
+        return sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+
+    def by_address(self) -> list[tuple[int, str, int]]:
+        """Passos de cada instrução do programa (endereço, instrução), da mais custosa
+        para a menos. Os passos do main entram na instrução buscada
+        """
+        totals: dict[int, int] = {}
+        macros: dict[int, str] = {}
+        for address, _, macro, ticks in self._entries():
+            totals[address] = totals.get(address, 0) + ticks
+            if macro != "main":
+                macros[address] = macro
+        entries = [
+            (address, macros.get(address, "main"), ticks)
+            for address, ticks in totals.items()
+        ]
+        return sorted(entries, key=lambda item: (-item[2], item[0]))
+
+    def report(self, top: int = 20) -> str:
+        """Relatório em texto: passos por instrução e os endereços mais custosos
+        Args:
+            top (int, opcional): número de endereços exibidos. Padrão é 20
+        Returns:
+            str: relatório
+        """
+        total = self.ticks or 1
+        lines = [f"passos: {self.ticks}", ""]
+        lines.append(f"{'instrução':<16}{'passos':>12}{'%':>8}")
+        for macro, ticks in self.by_macro():
+            lines.append(f"{macro:<16}{ticks:>12}{100 * ticks / total:>7.1f}%")
+
+        lines += ["", f"{'endereço':<20}{'instrução':<16}{'passos':>12}{'%':>8}"]
+        for address, macro, ticks in self.by_address()[:top]:
+            place = f"{address} ({self.label(address)})"
+            lines.append(
+                f"{place:<20}{macro:<16}{ticks:>12}{100 * ticks / total:>7.1f}%"
+            )
+        return "\n".join(lines)
+
+    def collapsed(self) -> str:
+        """Pilhas no formato 'collapsed' (flamegraph.pl, speedscope...):
+        programa;rótulo;instrução;MPC passos
+        """
+        lines = [
+            f"program;{self.label(address)};{macro};{mpc} {ticks}"
+            for address, mpc, macro, ticks in sorted(self._entries())
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_collapsed(self, path: str) -> None:
+        """Salva as pilhas de collapsed() em um arquivo"""
+        with open(path, "w") as output:
+            output.write(self.collapsed())
@@ -0,0 +1,303 @@
+import mmap
+import struct
+from bisect import bisect_right
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .components import Registers
+from .components.registers import SLOTS
+
+# Formato do arquivo: cabeçalho de 16 bytes seguido de registros de 16 bytes.
+#   registro: tipo (u8), registro/flags (u8), MPC (u16), a (u32), b (i64)
+#
+#   TICK  passo executado: MPC, flags (N << 1 | Z) após o passo
+#   REG   registro alterado pelo passo anterior: posição (SLOTS) e valor em b
+#   BIG   o mesmo que REG, para valores que não cabem em 64 bits: 'a' bytes do valor
+#         (complemento de 2, little-endian) nos registros seguintes, 16 bytes por registro
+#   MEM   palavra escrita na memória: endereço em a e valor em b
+#   KEY   estado completo antes do passo b: MPC e flags, seguido de REG/BIG de todos os
+#         registros e de MEM de todas as palavras não nulas da memória
+#   END   fim da execução: MPC e flags finais, número de passos em b
+#   INDEX posição (número do registro) de um KEY em a e seu passo em b
+#   TAIL  último registro: posição do primeiro INDEX em a, número de passos em b
+TICK, REG, BIG, MEM, KEY, END, INDEX, TAIL = range(1, 9)
+
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<BBHIq")
+MAGIC = b"CPUTRACE"
+VERSION = 2
+RECORD_BYTES = RECORD.size
+
+TRACED_SLOTS = tuple(SLOTS.values())  # PC, MBR, X, Y, H, K, MDR, MAR
+_I64 = (-(1 << 63), (1 << 63) - 1)
+
+
+class TraceState(NamedTuple):
+    """Estado da CPU antes de executar o passo 'tick'"""
+
+    tick: int
+    mpc: int
+    N: int
+    Z: int
+    registers: dict  # nome -> valor
+
+    def to_registers(self) -> Registers:
+        """Registros no formato da CPU (ex: print(state.to_registers()))"""
+        regs = Registers()
+        regs.MPC = self.mpc
+        for name, value in self.registers.items():
+            setattr(regs, name, value)
+        return regs
+
+
+class TraceTick(NamedTuple):
+    """Um passo da execução"""
+
+    tick: int
+    mpc: int
+    N: int
+    Z: int
+    registers: dict  # registros alterados: nome -> valor
+    writes: list  # palavras escritas na memória: (endereço, valor)
+
+
+_NAMES = {slot: name for name, slot in SLOTS.items()}
+
+
+class TraceWriter:
+    """Escreve o trace de uma execução passo a passo (CPU.execute(trace=...))"""
+
+    def __init__(self, path: str, keyframe: int = 4096, buffer: int = 1 << 20) -> None:
+        """
+        Args:
+            path (str): arquivo do trace
+            keyframe (int, opcional): passos entre estados completos. Padrão é 4096
+            buffer (int, opcional): bytes guardados antes de escrever no arquivo. Padrão é 1Mb
+        """
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, keyframe))
+        self.keyframe = keyframe
+        self._buffer = bytearray()
+        self._flush_at = buffer
+        self._records = 0  # registros escritos (posição do próximo registro)
+        self._index: list[tuple[int, int]] = []  # (posição, passo) de cada KEY
+        self._registers: list[int] = []  # valores após o último passo
+        self._memory: dict[int, int] = {}  # palavras não nulas após o último passo
+        self._flags = 0
+
+    def _write(
+        self, kind: int, slot: int = 0, mpc: int = 0, a: int = 0, b: int = 0
+    ) -> None:
+        self._buffer += RECORD.pack(kind, slot, mpc, a, b)
+        self._records += 1
+        if len(self._buffer) >= self._flush_at:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+    def _register(self, slot: int, value: int) -> None:
+        if _I64[0] <= value <= _I64[1]:
+            self._write(REG, slot, 0, 0, value)
+            return
+        size = (value.bit_length() + 8) // 8  # inclui o bit de sinal
+        data = value.to_bytes(size, "little", signed=True)
+        data += bytes(-size % RECORD_BYTES)
+        self._write(BIG, slot, 0, size)
+        for pos in range(0, len(data), RECORD_BYTES):
+            self._buffer += data[pos : pos + RECORD_BYTES]
+            self._records += 1
+
+    def _key(self, tick: int, mpc: int) -> None:
+        self._index.append((self._records, tick))
+        self._write(KEY, self._flags, mpc, 0, tick)
+        for slot in TRACED_SLOTS:
+            self._register(slot, self._registers[slot])
+        for address in sorted(self._memory):
+            self._write(MEM, 0, 0, address, self._memory[address])
+
+    def start(
+        self, mpc: int, n: int, z: int, registers: list, memory: Iterable[tuple]
+    ) -> None:
+        """Estado inicial: registros (Registers._file), flags e palavras não nulas da memória"""
+        self._registers = list(registers)
+        self._memory = {address: value for address, value in memory if value}
+        self._flags = n << 1 | z
+        self._key(0, mpc)
+
+    def step(
+        self,
+        tick: int,
+        mpc: int,
+        n: int,
+        z: int,
+        registers: list,
+        write: Optional[tuple] = None,
+    ) -> None:
+        """Registra o passo 'tick' (MPC executado) e o que ele alterou
+        Args:
+            tick (int): número do passo, a partir de 0
+            mpc (int): microinstrução executada
+            n (int): flag N após o passo
+            z (int): flag Z após o passo
+            registers (list): registros após o passo (Registers._file)
+            write (Optional[tuple], opcional): (endereço, valor) escrito na memória
+        """
+        if tick and not tick % self.keyframe:
+            self._key(tick, mpc)
+        self._flags = n << 1 | z
+        self._write(TICK, self._flags, mpc)
+        last = self._registers
+        for slot in TRACED_SLOTS:
+            if registers[slot] != last[slot]:
+                last[slot] = registers[slot]
+                self._register(slot, last[slot])
+        if write is not None:
+            address, value = write
+            if value:
+                self._memory[address] = value
+            else:
+                self._memory.pop(address, None)
+            self._write(MEM, 0, 0, address, value)
+
+    def close(self, ticks: int, mpc: int) -> None:
+        """Termina o trace
+        Args:
+            ticks (int): número de passos executados
+            mpc (int): MPC final
+        """
+        self._write(END, self._flags, mpc, 0, ticks)
+        index_start = self._records
+        for position, tick in self._index:
+            self._write(INDEX, 0, 0, position, tick)
+        self._write(TAIL, 0, 0, index_start, ticks)
+        self._file.write(self._buffer)
+        self._file.close()
+
+
+class TraceReader:
+    """Lê um trace escrito por CPU.execute(trace=...).
+
+    Os estados completos (KEY) gravados periodicamente, com os registros e a memória,
+    permitem ir a qualquer passo lendo apenas os registros desde o estado completo anterior
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as trace:
+            header = trace.read(HEADER.size)
+            if len(header) < HEADER.size or header[:8] != MAGIC:
+                raise ValueError("Not a CPU trace file", path)
+            # o arquivo é mapeado na memória: apenas os trechos lidos são carregados
+            self._data = mmap.mmap(trace.fileno(), 0, access=mmap.ACCESS_READ)
+        _, version, self.keyframe = HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError("Unsupported trace version", version)
+        if (len(self._data) - HEADER.size) % RECORD_BYTES:
+            raise ValueError("Truncated trace file", path)
+
+        kind, _, _, index_start, self.ticks = self._record(self._count() - 1)
+        if kind != TAIL:
+            raise ValueError("Incomplete trace (execution did not finish)", path)
+        index = [self._record(pos) for pos in range(index_start, self._count() - 1)]
+        self._key_positions = [record[3] for record in index]
+        self._key_ticks = [record[4] for record in index]
+
+    def _count(self) -> int:
+        return (len(self._data) - HEADER.size) // RECORD_BYTES
+
+    def _record(self, position: int) -> tuple:
+        return RECORD.unpack_from(self._data, HEADER.size + position * RECORD_BYTES)
+
+    def _records(self, position: int) -> Iterator[tuple[int, tuple]]:
+        """Registros a partir da posição dada, com valores BIG já convertidos: (posição, registro)"""
+        count = self._count()
+        while position < count:
+            record = self._record(position)
+            if record[0] == BIG:
+                start = HEADER.size + (position + 1) * RECORD_BYTES
+                value = int.from_bytes(
+                    self._data[start : start + record[3]], "little", signed=True
+                )
+                yield position, (REG, record[1], 0, 0, value)
+                position += 1 + -(-record[3] // RECORD_BYTES)
+                continue
+            yield position, record
+            position += 1
+
+    def __len__(self) -> int:
+        return self.ticks
+
+    def __iter__(self) -> Iterator[TraceTick]:
+        return self.replay()
+
+    def replay(self, start: int = 0) -> Iterator[TraceTick]:
+        """Passos da execução a partir do passo 'start'"""
+        key = bisect_right(self._key_ticks, start) - 1
+        tick = self._key_ticks[key] - 1
+        current: Optional[TraceTick] = None
+        changes = False  # os REG e MEM seguintes pertencem ao passo atual
+        for _, (kind, slot, mpc, a, b) in self._records(self._key_positions[key]):
+            if kind == TICK or kind == END:
+                if current is not None and current.tick >= start:
+                    yield current
+                if kind == END:
+                    return
+                tick += 1
+                current = TraceTick(tick, mpc, slot >> 1, slot & 1, {}, [])
+                changes = True
+            elif kind == KEY:  # estado completo: não são alterações de nenhum passo
+                changes = False
+            elif not changes:
+                continue
+            elif kind == REG:
+                current.registers[_NAMES[slot]] = b  # type: ignore
+            elif kind == MEM:
+                current.writes.append((a, b))  # type: ignore
+
+    def seek(self, tick: int) -> TraceState:
+        """Estado da CPU antes do passo 'tick' (tick = len(trace) é o estado final)
+        Args:
+            tick (int): passo, de 0 até o número de passos
+        Returns:
+            TraceState: MPC, flags e registros
+        """
+        if not 0 <= tick <= self.ticks:
+            raise IndexError("Tick outside the trace", tick)
+        key = bisect_right(self._key_ticks, tick) - 1
+        current = self._key_ticks[key]
+        registers: dict[str, int] = {}
+        flags = 0
+        records = self._records(self._key_positions[key])
+        for _, (kind, slot, record_mpc, _, b) in records:
+            if kind == KEY:
+                flags = slot
+                continue
+            if kind == TICK or kind == END:
+                if current == tick:
+                    return TraceState(
+                        tick, record_mpc, flags >> 1, flags & 1, registers
+                    )
+                if kind == END:
+                    break
+                current += 1
+                flags = slot
+            elif kind == REG:
+                registers[_NAMES[slot]] = b
+        raise ValueError("Corrupted trace: tick not found", tick)
+
+    def memory(self, tick: int) -> dict[int, int]:
+        """Palavras não nulas da memória antes do passo 'tick' {endereço: valor}.
+        Começa pela memória do estado completo anterior ao passo
+        """
+        if not 0 <= tick <= self.ticks:
+            raise IndexError("Tick outside the trace", tick)
+        key = bisect_right(self._key_ticks, tick) - 1
+        current = self._key_ticks[key] - 1  # as palavras do KEY são anteriores ao passo
+        words: dict[int, int] = {}
+        for _, (kind, _, _, a, b) in self._records(self._key_positions[key]):
+            if kind == TICK:
+                current += 1
+                if current >= tick:
+                    break
+            elif kind == MEM:
+                words[a] = b
+            elif kind == END:
+                break
+        return {address: value for address, value in words.items() if value}
@@ -0,0 +1,317 @@
+from typing import Callable, Optional, Union
+
+from .components.alu import _DISPATCH, EXPRESSIONS, SHIFT_EXPRESSIONS
+from .components.registers import SLOTS, WRITE_SLOTS
+
+# registros mantidos em variáveis locais da função gerada (seus valores dependem dos dados)
+DYNAMIC_REGISTERS = ("X", "Y", "H", "K", "MDR")
+
+# número máximo de estados visitados antes de desistir da tradução
+MAX_STATES = 200_000
+
+# profundidade máxima de blocos 'if' aninhados no código gerado
+MAX_DEPTH = 60
+
+_NAMES = {slot: name for name, slot in SLOTS.items()}
+
+# valor de um operando: int quando conhecido na tradução, str com o nome da variável caso contrário
+Value = Union[int, str]
+
+
+class NativeProgram:
+    """Programa traduzido para uma função python"""
+
+    def __init__(self, source: str, entry: tuple) -> None:
+        """
+        Args:
+            source (str): código da função gerada
+            entry (tuple): estado (MPC, PC, MBR, MAR, N, Z) em que a CPU deve estar para executar o programa
+        """
+        self.source = source
+        self.entry = entry
+        namespace: dict[str, Callable] = {}
+        exec(source, namespace)
+        self._program = namespace["program"]
+
+    def run(self, cpu) -> int:
+        """Executa o programa sobre os registros e a memória da CPU dada
+        Args:
+            cpu (CPU): CPU com a imagem carregada
+        Returns:
+            int: Número de passos (microinstruções executadas)
+        """
+        regs, alu, bus, memory = cpu._regs, cpu._alu, cpu._bus, cpu._memory
+        if (regs.MPC, regs.PC, regs.MBR, regs.MAR, alu.N, alu.Z) != self.entry:
+            raise ValueError("CPU state does not match the translated entry point")
+
+        (
+            ticks,
+            regs.X,
+            regs.Y,
+            regs.H,
+            regs.K,
+            regs.MDR,
+            regs.PC,
+            regs.MBR,
+            regs.MAR,
+            regs.MPC,
+            alu.N,
+            alu.Z,
+            bus.BUS_A,
+            bus.BUS_B,
+            bus.BUS_C,
+        ) = self._program(
+            regs.X,
+            regs.Y,
+            regs.H,
+            regs.K,
+            regs.MDR,
+            bus.BUS_A,
+            bus.BUS_B,
+            bus.BUS_C,
+            memory.read_byte,
+            memory.read_word,
+            memory.write_word,
+        )
+        regs.MIR = cpu.firmware[regs.MPC]
+        return ticks
+
+
+class Translator:
+    """Traduz o programa carregado na memória de uma CPU para uma única função python.
+
+    O fluxo de controle entre as instruções é conhecido após o carregamento da imagem:
+    PC, MBR e MAR dependem apenas do código, então são calculados durante a tradução e
+    os saltos (main, goto, jzX, jzK, jzY...) são resolvidos para o destino real.
+    X, Y, H, K e MDR ficam em variáveis locais e apenas os desvios que dependem
+    deles (JAM em Z ou N) viram 'if' no código gerado.
+
+    Os barramentos recebem, ao final, os valores da última microinstrução executada
+    """
+
+    def __init__(self, cpu) -> None:
+        self.cpu = cpu
+        self.control_store = cpu.control_store
+        self.firmware = cpu.firmware
+
+        # estados abstratos: (MPC, PC, MBR, MAR, flags)
+        # flags: (N, Z) quando conhecidos ou "res" quando dependem da última operação
+        self._states: dict[tuple, int] = {}
+        self._code: list[list[str]] = []  # código de cada estado
+        self._successors: list[list[tuple]] = []  # (condição, estado) de cada estado
+        self._fetched: set[int] = set()  # bytes lidos como instrução
+        self._written: set[int] = set()  # words escritas na memória
+
+    @staticmethod
+    def _format(value: Value) -> str:
+        return f"({value})" if isinstance(value, int) and value < 0 else str(value)
+
+    def _operand(self, reg_num: int, pc: int, mbr: int) -> Value:
+        """Valor lido no barramento A ou B"""
+        if reg_num == SLOTS["PC"]:
+            return pc
+        elif reg_num == SLOTS["MBR"]:
+            return mbr
+        return _NAMES[reg_num] if reg_num else 0
+
+    def _state_id(self, state: tuple, pending: list) -> int:
+        if state not in self._states:
+            if len(self._states) >= MAX_STATES:
+                raise ValueError("Program too large to translate")
+            self._states[state] = len(self._states)
+            self._code.append([])
+            self._successors.append([])
+            pending.append(state)
+        return self._states[state]
+
+    def _visit(self, state: tuple, pending: list) -> None:
+        """Gera o código de uma microinstrução e os estados seguintes"""
+        mpc, pc, mbr, mar, flags = state
+        idx = self._states[state]
+        code = self._code[idx]
+
+        if not self.firmware[mpc]:  # halt
+            if flags == "res":
+                n, z = "1 if res else 0", "0 if res else 1"
+            else:
+                n, z = flags
+            regs = ", ".join(DYNAMIC_REGISTERS)
+            code.append(
+                f"return t, {regs}, {pc}, {mbr}, {mar}, {mpc}, {n}, {z}, A, B, C"
+            )
+            return
+
+        nxt, jam, alu, w_regs, mem, r_regsB, r_regsA = self.control_store[mpc]
+        a = self._operand(r_regsA, pc, mbr)
+        b = self._operand(r_regsB, pc, mbr)
+        slot = WRITE_SLOTS[w_regs]
+        target = _NAMES.get(slot)
+
+        c: Optional[Value] = None  # valor do barramento C
+        # valores dos barramentos, escritos apenas antes de um halt (ver _bus_values)
+        bus_a_b = f"A = {self._format(a)}; B = {self._format(b)}"
+        if alu:
+            if isinstance(a, int) and isinstance(b, int):
+                op, shift = _DISPATCH[alu]
+                res = op(a, b)
+                flags = (int(bool(res)), int(not res))
+                c = shift(res) if shift else res
+            else:
+                op_expr = EXPRESSIONS[alu & 0b111111].format(
+                    a=self._format(a), b=self._format(b)
+                )
+                shift_expr = SHIFT_EXPRESSIONS.get(alu >> 6)
+                flags = "res"
+                c = shift_expr.format(res="res") if shift_expr else "res"
+                if target in DYNAMIC_REGISTERS and not shift_expr:
+                    code.append(f"{target} = res = {op_expr}")
+                    target = None
+                else:
+                    code.append(f"res = {op_expr}")
+        elif target:
+            raise ValueError("Register written without ALU operation", mpc)
+        bus_c = (len(code), None if c is None else f"C = {self._format(c)}")
+
+        if target in DYNAMIC_REGISTERS:
+            code.append(f"{target} = {self._format(c)}")  # type: ignore
+        elif target == "PC" or target == "MAR":
+            if not isinstance(c, int):
+                raise ValueError(f"Data-dependent value written to {target}", mpc)
+            pc, mar = (c, mar) if target == "PC" else (pc, c)
+
+        if mem & 0b001:
+            try:
+                mbr = self.cpu._memory.read_byte(pc)
+            except IndexError:  # o erro acontece durante a execução, como na CPU
+                code += [f"rb({pc})", "raise IndexError"]
+                return
+            self._fetched.add(pc & 0x1FFFFF)
+        elif mem & 0b010:
+            code.append(f"MDR = rw({mar})")
+        elif mem & 0b100:
+            code.append(f"ww({mar}, MDR)")
+            self._written.add(mar & 0x7FFFF)
+
+        if jam & 0b011 and flags == "res":
+            # desvio dependente dos dados: Z = not res | N = bool(res)
+            taken = "not res" if jam & 0b001 else "res"
+            for cond, nxt_mpc in ((taken, nxt | 256), (None, nxt)):
+                nxt_state = (nxt_mpc, pc, mbr, mar, flags)
+                self._successors[idx].append(
+                    (cond, self._state_id(nxt_state, pending))
+                )
+            self._bus_values(code, mpc, (nxt, nxt | 256), bus_a_b, bus_c)
+            return
+
+        if jam & 0b001:
+            nxt |= flags[1] << 8
+        elif jam & 0b010:
+            nxt |= flags[0] << 8
+        elif jam & 0b100:
+            nxt |= mbr
+        nxt_state = (nxt, pc, mbr, mar, flags)
+        self._successors[idx].append((None, self._state_id(nxt_state, pending)))
+        self._bus_values(code, mpc, (nxt,), bus_a_b, bus_c)
+
+    def _bus_values(
+        self, code: list, mpc: int, successors: tuple, bus_a_b: str, bus_c: tuple
+    ) -> None:
+        """Adiciona ao código de uma microinstrução seguida de um halt os valores dos
+        barramentos, devolvidos pela função gerada como na execução passo a passo
+        """
+        if all(self.firmware[nxt] for nxt in successors):
+            return
+        position, statement = bus_c
+        if statement is None:
+            # o barramento C teria o valor de uma microinstrução anterior
+            raise ValueError("Halt after a microinstruction without ALU operation", mpc)
+        code.insert(position, statement)
+        code.insert(0, bus_a_b)
+
+    def _explore(self, entry: tuple) -> None:
+        pending: list = []
+        self._state_id(entry, pending)
+        while pending:
+            self._visit(pending.pop(), pending)
+
+        fetched_words = {byte >> 2 for byte in self._fetched}
+        if fetched_words & self._written:
+            raise ValueError("Self-modifying programs cannot be translated")
+
+    def _emit(self, idx: int, labels: set, preds: list, depth: int) -> list[str]:
+        """Gera o código a partir do estado dado até os próximos rótulos"""
+        lines: list[str] = []
+        ticks = 0
+        while True:
+            lines += self._code[idx]
+            successors = self._successors[idx]
+            if not successors:  # halt ou erro
+                if ticks:
+                    lines.insert(len(lines) - 1, f"t += {ticks}")
+                return lines
+            ticks += 1
+
+            if len(successors) == 1:
+                nxt = successors[0][1]
+                if nxt in labels or preds[nxt] > 1:
+                    labels.add(nxt)
+                    return lines + [f"t += {ticks}", f"s = {nxt}", "continue"]
+                idx = nxt
+                continue
+
+            lines.append(f"t += {ticks}")
+            (cond, taken), (_, not_taken) = successors
+            for header, nxt in ((f"if {cond}:", taken), ("else:", not_taken)):
+                lines.append(header)
+                if nxt in labels or preds[nxt] > 1 or depth >= MAX_DEPTH:
+                    labels.add(nxt)
+                    branch = [f"s = {nxt}", "continue"]
+                else:
+                    branch = self._emit(nxt, labels, preds, depth + 1)
+                lines += ["    " + line for line in branch]
+            return lines
+
+    @staticmethod
+    def _dispatch(labels: list, bodies: dict) -> list[str]:
+        """Árvore de 'if' que escolhe o rótulo pelo valor de s"""
+        if len(labels) == 1:
+            return bodies[labels[0]]
+        mid = len(labels) // 2
+        lines = [f"if s < {labels[mid]}:"]
+        lines += ["    " + line for line in Translator._dispatch(labels[:mid], bodies)]
+        lines.append("else:")
+        lines += ["    " + line for line in Translator._dispatch(labels[mid:], bodies)]
+        return lines
+
+    def translate(self) -> NativeProgram:
+        """Traduz o programa a partir do estado atual da CPU
+        Returns:
+            NativeProgram: programa traduzido
+        raises:
+            ValueError -> O programa não pode ser traduzido (código auto-modificável,
+                PC ou MAR dependentes dos dados ou programa grande demais)
+        """
+        regs, alu = self.cpu._regs, self.cpu._alu
+        entry = (regs.MPC, regs.PC, regs.MBR, regs.MAR, (alu.N, alu.Z))
+        self._explore(entry)
+
+        preds = [0] * len(self._code)
+        preds[0] = 1  # estado inicial
+        for successors in self._successors:
+            for _, nxt in successors:
+                preds[nxt] += 1
+
+        labels = {0}
+        bodies: dict[int, list[str]] = {}
+        while missing := labels - bodies.keys():
+            for label in sorted(missing):
+                bodies[label] = self._emit(label, labels, preds, 0)
+
+        params = ", ".join(DYNAMIC_REGISTERS)
+        lines = [f"def program({params}, A, B, C, rb, rw, ww):", "    t = 0"]
+        lines.append("    s = 0")
+        lines.append("    while True:")
+        lines += [
+            "        " + line for line in self._dispatch(sorted(bodies), bodies)
+        ]
+        return NativeProgram("\n".join(lines), entry[:4] + entry[4])
@@ -0,0 +1,232 @@
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional: apenas o VectorCPU depende dele
+    np = None  # type: ignore
+
+from .components.alu import _DISPATCH
+from .components.registers import SLOTS, WRITE_SLOTS
+from .cpu import CPU
+from .cpu_base import CPUBase
+
+_REGISTERS = 10  # mesmo layout de Registers._file (0 = sem registro, 9 = descarte)
+# operandos abaixo deste valor nunca passam dos 64 bits em uma operação da ULA
+# (soma seguida de deslocamento de 8 bits)
+_LIMIT = 1 << 53
+
+
+class VectorCPU:
+    """Executa várias CPUs em paralelo sobre arrays do NumPy.
+
+    Todas as CPUs (lanes) rodam o mesmo programa, com memórias iniciais possivelmente
+    diferentes, e avançam juntas uma microinstrução por vez. As CPUs que chegam ao
+    halt param de contar passos.
+
+    Os registros são inteiros de 64 bits, enquanto na CPU são inteiros sem limite.
+    Antes de cada microinstrução, as CPUs com algum operando grande demais para os
+    64 bits deixam os arrays e terminam a execução em uma CPU comum (ver 'scalar'),
+    então os resultados são sempre os mesmos da CPU.
+    A memória de cada CPU tem apenas 'words' palavras de 32 bits
+    """
+
+    def __init__(
+        self,
+        image: bytes,
+        lanes: int,
+        words: Optional[int] = None,
+        cpu_base: Optional[CPUBase] = None,
+    ) -> None:
+        """
+        Args:
+            image (bytes): imagem do programa (conteúdo do program.bin)
+            lanes (int): número de CPUs
+            words (Optional[int], opcional): palavras de memória de cada CPU.
+                Padrão é o tamanho da imagem mais 256 palavras
+            cpu_base (Optional[CPUBase], opcional): firmware a ser usado. Padrão é um novo CPUBase
+        raises:
+            ImportError -> numpy não está instalado
+        """
+        if np is None:
+            raise ImportError("VectorCPU requires numpy (pip install numpy)")
+
+        cpu_base = cpu_base or CPUBase()
+        self._cpu_base = cpu_base
+        # as operações da ULA já foram verificadas ao montar o firmware (CPUBase.tables)
+        fields = np.array(cpu_base.control_store, dtype=np.int64).reshape(-1, 7)
+
+        self._live = np.array(cpu_base.firmware, dtype=np.uint64) != 0
+        self._halt = int(np.argmin(self._live))  # MPC das CPUs que saíram dos arrays
+        self._next, self._jam, self._alu_bits = fields[:, 0], fields[:, 1], fields[:, 2]
+        self._write = np.array(WRITE_SLOTS, dtype=np.int64)[fields[:, 3]]
+        self._mem, self._read_b, self._read_a = fields[:, 4], fields[:, 5], fields[:, 6]
+
+        n_words = (len(image) + 3) // 4
+        self.words = n_words + 256 if words is None else words
+        if n_words > self.words:
+            raise ValueError("Image does not fit in the lane memory")
+
+        self.lanes = lanes
+        self.memory = np.zeros((lanes, self.words), dtype=np.uint32)
+        padded = bytes(image) + bytes(n_words * 4 - len(image))
+        self.memory[:, :n_words] = np.frombuffer(padded, dtype="<u4")
+
+        self.regs = np.zeros((_REGISTERS, lanes), dtype=np.int64)
+        self.mpc = np.zeros(lanes, dtype=np.int64)
+        self.N = np.zeros(lanes, dtype=np.int64)
+        self.Z = np.ones(lanes, dtype=np.int64)
+        self.bus_c = np.zeros(lanes, dtype=np.int64)
+        self.ticks = np.zeros(lanes, dtype=np.int64)
+        # CPUs cujos registros passaram dos 64 bits, executadas pela CPU comum {lane: CPU}
+        self.scalar: dict[int, CPU] = {}
+
+    def register(self, name: str) -> "np.ndarray":
+        """Valores do registro com o nome dado (X, Y, H, K, PC...) em todas as CPUs.
+        Caso alguma CPU tenha passado dos 64 bits, o array tem inteiros do python (object)
+        """
+        values = self.regs[SLOTS[name]]
+        if not self.scalar:
+            return values
+        values = values.astype(object)
+        for lane, cpu in self.scalar.items():
+            values[lane] = getattr(cpu._regs, name)
+        return values
+
+    def halted(self) -> "np.ndarray":
+        """Máscara das CPUs que chegaram ao halt"""
+        halted = ~self._live[self.mpc]
+        for lane, cpu in self.scalar.items():
+            halted[lane] = cpu.halted
+        return halted
+
+    def set_word(self, address: int, values) -> None:
+        """Escreve uma palavra da memória de cada CPU (ex: a entrada na palavra 1)
+        Args:
+            address (int): endereço da palavra
+            values: um valor para cada CPU (ou um único valor para todas)
+        """
+        values = np.asarray(values, dtype=np.int64) & 0xFFFFFFFF
+        self.memory[:, address] = values.astype(np.uint32)
+
+    def _check_address(self, words: "np.ndarray") -> None:
+        if words.size and int(words.max()) >= self.words:
+            raise IndexError("Memory address outside the lane memory", int(words.max()))
+
+    def _to_scalar(self, lane: int) -> None:
+        """Passa a CPU da lane para uma CPU comum, no estado atual"""
+        cpu = CPU()
+        base = self._cpu_base
+        cpu.firmware, cpu.control_store, cpu._loops = (
+            base.firmware,
+            base.control_store,
+            base._loops,
+        )
+        cpu.load_image(self.memory[lane].astype("<u4").tobytes())
+        cpu._regs._file[:] = [int(value) for value in self.regs[:, lane]]
+        cpu._regs.MPC = int(self.mpc[lane])
+        cpu._regs.MIR = cpu.firmware[cpu._regs.MPC]
+        cpu._alu.N, cpu._alu.Z = int(self.N[lane]), int(self.Z[lane])
+        cpu._bus.BUS_C = int(self.bus_c[lane])
+        self.scalar[lane] = cpu
+        self.mpc[lane] = self._halt
+
+    def _run_scalar(self, lane: int, max_ticks: Optional[int]) -> None:
+        """Executa a CPU comum da lane e copia sua memória para a da lane"""
+        cpu = self.scalar[lane]
+        if cpu.halted:
+            return
+        self.ticks[lane] += cpu.execute("fast", max_ticks)
+        read_word = cpu._memory.read_word
+        self.memory[lane] = [read_word(address) for address in range(self.words)]
+
+    def _step(self, max_ticks: Optional[int] = None) -> "np.ndarray":
+        """Executa uma microinstrução em todas as CPUs
+        Args:
+            max_ticks (Optional[int], opcional): passos restantes para as CPUs que
+                passarem dos 64 bits neste passo. Padrão é sem limite
+        Returns:
+            np.ndarray: máscara das CPUs que ainda não pararam
+        """
+        lanes = np.arange(self.lanes)
+        regs = self.regs
+        a = regs[self._read_a[self.mpc], lanes]
+        b = regs[self._read_b[self.mpc], lanes]
+
+        # operandos que poderiam passar dos 64 bits: as CPUs continuam na CPU comum
+        large = (np.abs(a) >= _LIMIT) | (np.abs(b) >= _LIMIT)
+        if large.any():
+            for lane in np.nonzero(large)[0].tolist():
+                self._to_scalar(lane)
+                self._run_scalar(lane, max_ticks)
+            a = regs[self._read_a[self.mpc], lanes]
+            b = regs[self._read_b[self.mpc], lanes]
+
+        mpc = self.mpc
+        active = self._live[mpc]
+
+        # ULA: uma operação vetorizada para cada palavra de controle presente
+        alu_bits = self._alu_bits[mpc]
+        c = self.bus_c
+        for control_bits in np.nonzero(np.bincount(alu_bits, minlength=256))[0]:
+            if not control_bits:
+                continue
+            sel = alu_bits == control_bits
+            op, shift = _DISPATCH[control_bits]
+            res = np.broadcast_to(np.asarray(op(a[sel], b[sel]), dtype=np.int64), (int(sel.sum()),))
+            self.N[sel] = res != 0
+            self.Z[sel] = res == 0
+            c[sel] = shift(res) if shift else res
+
+        regs[self._write[mpc], lanes] = c
+
+        # memória (fetch > read > write)
+        mem = self._mem[mpc]
+        fetch = np.nonzero(mem & 0b001)[0]
+        if fetch.size:
+            byte = regs[SLOTS["PC"], fetch] & 0x1FFFFF
+            self._check_address(byte >> 2)
+            word = self.memory[fetch, byte >> 2].astype(np.int64)
+            regs[SLOTS["MBR"], fetch] = (word >> ((byte & 0b11) << 3)) & 0xFF
+        read = np.nonzero((mem & 0b011) == 0b010)[0]
+        if read.size:
+            address = regs[SLOTS["MAR"], read] & 0x7FFFF
+            self._check_address(address)
+            regs[SLOTS["MDR"], read] = self.memory[read, address]
+        write = np.nonzero((mem & 0b111) == 0b100)[0]
+        if write.size:
+            address = regs[SLOTS["MAR"], write] & 0x7FFFF
+            self._check_address(address)
+            value = regs[SLOTS["MDR"], write] & 0xFFFFFFFF
+            self.memory[write, address] = value.astype(np.uint32)
+
+        # próxima instrução
+        jam = self._jam[mpc]
+        nxt = self._next[mpc]
+        nxt = np.where(jam & 0b001, nxt | (self.Z << 8), nxt)
+        nxt = np.where((jam & 0b011) == 0b010, nxt | (self.N << 8), nxt)
+        nxt = np.where((jam & 0b111) == 0b100, nxt | regs[SLOTS["MBR"]], nxt)
+
+        self.mpc = np.where(active, nxt, mpc)
+        self.ticks += active
+        return active
+
+    def execute(self, max_ticks: Optional[int] = None) -> "np.ndarray":
+        """Executa todas as CPUs até o halt
+        Args:
+            max_ticks (Optional[int], opcional): número máximo de passos. Padrão é sem limite
+        Returns:
+            np.ndarray: número de passos de cada CPU
+        """
+        for lane in self.scalar:
+            self._run_scalar(lane, max_ticks)
+
+        tick = 0
+        while self._live[self.mpc].any():
+            if max_ticks is None:
+                self._step()
+            elif tick < max_ticks:
+                self._step(max_ticks - tick)
+            else:
+                break
+            tick += 1
+        return self.ticks
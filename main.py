@@ -1,4 +1,9 @@
-from emulator import CPU, Assembler
+import argparse
+import sys
+
+from emulator import CPU, Assembler, benchmark
+from emulator.batch import run_batch
+from emulator.profiler import Profile
 
 
 def main():
@@ -20,6 +25,187 @@ def main():
         print(f"{var}: {cpu._memory._memory[num+1]}")
 
 
+def _parse_values(values: str) -> list[int]:
+    """Converte '1900:2100' (intervalo, fim exclusivo) ou '5,6,100' em uma lista de valores"""
+    if ":" in values:
+        start, stop = values.split(":")
+        return list(range(int(start), int(stop)))
+    return [int(value) for value in values.split(",")]
+
+
+def batch(args: argparse.Namespace) -> None:
+    """Executa o programa para cada valor dado na palavra escolhida da memória"""
+    assembler = Assembler(args.source, args.output)
+    image = assembler.execute()
+
+    target = args.var or args.word
+    patches = ({target: value} for value in _parse_values(args.values))
+    results = run_batch(
+        image,
+        patches,
+        args.watch,
+        args.mode,
+        args.workers,
+        args.chunksize,
+        assembler.names,
+        args.max_ticks or None,
+    )
+
+    print("entrada", "passos", *[f"mem[{word}]" for word in args.watch], sep="\t")
+    unfinished = 0
+    for result in results:
+        words = [result.words[word] for word in args.watch]
+        ticks = result.ticks if result.halted else f"{result.ticks}+"
+        unfinished += not result.halted
+        print(result.patch[target], ticks, *words, sep="\t", flush=True)
+    if unfinished:
+        print(f"{unfinished} execuções não chegaram ao halt em {args.max_ticks} passos")
+
+
+def profile(args: argparse.Namespace) -> None:
+    """Executa o programa passo a passo e exibe os passos por instrução e endereço"""
+    assembler = Assembler(args.source, args.output)
+    image = assembler.execute()
+
+    cpu = CPU()
+    cpu.load_image(image, assembler.names)
+    if args.value is not None:
+        if args.var:
+            cpu.set_var(args.var, args.value)
+        else:
+            cpu._memory.write_word(args.word, args.value)
+
+    result = Profile(cpu, assembler.names)
+    cpu.execute(profile=result)
+    print(result.report(args.top))
+    if args.collapsed:
+        result.write_collapsed(args.collapsed)
+
+
+def bench(args: argparse.Namespace) -> None:
+    """Executa os programas das questões e compara com as referências salvas"""
+    cases = [
+        case for case in benchmark.CASES if not args.cases or case.name in args.cases
+    ]
+    baseline = benchmark.load_baseline(args.baseline)
+    # o modo "step" é a referência do ganho dos demais (ver benchmark.compare)
+    modes = ["step"] + [mode for mode in args.mode if mode != "step"]
+    results = benchmark.run_benchmarks(cases, modes, args.repeat)
+    print(benchmark.report(results, baseline))
+
+    if args.save:
+        benchmark.save_baseline(args.baseline, results)
+        print(f"referências salvas em {args.baseline}")
+        return
+    problems = benchmark.compare(results, baseline, args.tolerance)
+    for problem in problems:
+        print("regressão:", problem)
+    if problems:
+        sys.exit(1)
+
+
+def _arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Emulador da CPU")
+    commands = parser.add_subparsers(dest="command")
+
+    batch_parser = commands.add_parser(
+        "batch", help="executa um programa para vários valores de entrada"
+    )
+    batch_parser.add_argument("source", help="arquivo .asm")
+    batch_parser.add_argument(
+        "--values", required=True, help="'inicio:fim' (fim exclusivo) ou 'v1,v2,...'"
+    )
+    batch_parser.add_argument(
+        "--word", type=int, default=1, help="palavra da entrada (padrão: 1)"
+    )
+    batch_parser.add_argument("--var", help="nome da variável da entrada (ex: in_out)")
+    batch_parser.add_argument(
+        "--watch",
+        type=int,
+        nargs="+",
+        default=[1],
+        help="palavras exibidas após a execução (padrão: 1)",
+    )
+    batch_parser.add_argument(
+        "--mode",
+        default="fast",
+        help="modo de execução: step, blocks, fast, native ou vector (padrão: fast)",
+    )
+    batch_parser.add_argument("--workers", type=int, help="número de processos")
+    batch_parser.add_argument("--chunksize", type=int, default=64)
+    batch_parser.add_argument(
+        "--max-ticks",
+        type=int,
+        help="passos máximos de cada execução, 0 sem limite "
+        "(padrão: 10000000, sem limite no modo native, que não aceita limite)",
+    )
+    batch_parser.add_argument("--output", default="program.bin")
+
+    profile_parser = commands.add_parser(
+        "profile", help="exibe os passos gastos em cada instrução do programa"
+    )
+    profile_parser.add_argument("source", help="arquivo .asm")
+    profile_parser.add_argument("--value", type=int, help="valor da entrada")
+    profile_parser.add_argument(
+        "--word", type=int, default=1, help="palavra da entrada (padrão: 1)"
+    )
+    profile_parser.add_argument("--var", help="nome da variável da entrada (ex: in_out)")
+    profile_parser.add_argument(
+        "--top", type=int, default=20, help="endereços exibidos (padrão: 20)"
+    )
+    profile_parser.add_argument(
+        "--collapsed", help="arquivo de pilhas para flame graphs (flamegraph.pl, speedscope)"
+    )
+    profile_parser.add_argument("--output", default="program.bin")
+
+    bench_parser = commands.add_parser(
+        "bench", help="mede os programas das questões e compara com as referências"
+    )
+    bench_parser.add_argument(
+        "cases", nargs="*", help="casos executados (padrão: todos, ver emulator/benchmark.py)"
+    )
+    bench_parser.add_argument(
+        "--mode",
+        nargs="+",
+        default=["step"],
+        help="modos de execução; o step sempre roda, como referência (padrão: step)",
+    )
+    bench_parser.add_argument(
+        "--repeat", type=int, default=5, help="repetições de cada caso (padrão: 5)"
+    )
+    bench_parser.add_argument(
+        "--baseline",
+        default="benchmarks/baseline.json",
+        help="arquivo das referências (padrão: benchmarks/baseline.json)",
+    )
+    bench_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="perda de ganho sobre o modo step ou aumento de memória aceitos antes "
+        "de falhar (padrão: 0.2)",
+    )
+    bench_parser.add_argument(
+        "--save", action="store_true", help="salva os resultados como referência"
+    )
+
+    args = parser.parse_args()
+    if args.command == "batch":
+        if args.mode == "native" and args.max_ticks:
+            batch_parser.error("--max-ticks não é suportado no modo native")
+        if args.max_ticks is None:
+            args.max_ticks = 0 if args.mode == "native" else 10_000_000
+    return args
+
+
 if __name__ == "__main__":
-    main()
+    args = _arguments()
+    if args.command == "batch":
+        batch(args)
+    elif args.command == "profile":
+        profile(args)
+    elif args.command == "bench":
+        bench(args)
+    else:
+        main()
     # teste()
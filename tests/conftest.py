@@ -0,0 +1,95 @@
+import os
+import tempfile
+
+import pytest
+
+from emulator import CPU, Assembler
+from emulator.benchmark import CASES
+from emulator.cache import CACHE_DIR_ENV
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_cache_dir = tempfile.TemporaryDirectory(prefix="emulator-cache-")
+
+
+def pytest_configure(config) -> None:
+    """O cache em disco dos testes fica em um diretório temporário, e não no do usuário.
+    Configurado antes da coleta: alguns módulos criam CPUs ao serem importados
+    """
+    os.environ[CACHE_DIR_ENV] = _cache_dir.name
+
+
+def pytest_unconfigure(config) -> None:
+    _cache_dir.cleanup()
+
+
+def assemble(source: str) -> tuple[bytes, dict[str, int]]:
+    """Monta um programa da raiz do repositório em memória, sem o cache em disco"""
+    assembler = Assembler(os.path.join(ROOT, source), None, cache=False)
+    return assembler.execute(), assembler.names
+
+
+def read_lines(source: str) -> list[str]:
+    """Linhas de um programa da raiz do repositório"""
+    with open(os.path.join(ROOT, source)) as src:
+        return src.readlines()
+
+
+def sample(case, count: int = 12) -> list[int]:
+    """Entradas do caso espalhadas pelo intervalo, incluindo a primeira e a última"""
+    step = max(len(case.values) // count, 1)
+    return sorted(set(case.values[::step]) | {case.values[-1]})
+
+
+def cpu_state(cpu: CPU, mir: bool = True, memory: bool = True) -> tuple:
+    """Estado observável da CPU. O registro 9 apenas descarta escritas e é ignorado.
+
+    O MIR é recarregado do firmware no início de cada passo: no modo "step" ele guarda
+    a última microinstrução executada e nos demais modos a próxima, então só é
+    comparado no halt (mir=False no meio da execução)
+    """
+    regs, alu, bus = cpu._regs, cpu._alu, cpu._bus
+    return (
+        tuple(regs._file[:9]),
+        regs.MPC,
+        regs.MIR if mir else None,
+        (alu.N, alu.Z),
+        (bus.BUS_A, bus.BUS_B, bus.BUS_C),
+        dict(cpu._memory.items()) if memory else None,
+    )
+
+
+@pytest.fixture(scope="session")
+def sources() -> dict:
+    """Linhas do código fonte de cada caso do benchmark, pelo nome do caso"""
+    return {case.name: read_lines(case.source) for case in CASES}
+
+
+@pytest.fixture(scope="session")
+def programs() -> dict:
+    """Imagem e nomes de cada caso do benchmark, pelo nome do caso"""
+    return {case.name: assemble(case.source) for case in CASES}
+
+
+@pytest.fixture
+def new_cpu(programs):
+    """Cria uma CPU com o programa do caso carregado e a entrada escrita"""
+
+    def new_cpu(case, value: int) -> CPU:
+        cpu = CPU()
+        cpu.load_image(*programs[case.name])
+        cpu._memory.write_word(case.word, value)
+        return cpu
+
+    return new_cpu
+
+
+@pytest.fixture
+def state():
+    """cpu_state, para comparar CPUs executadas em modos diferentes"""
+    return cpu_state
+
+
+@pytest.fixture
+def values():
+    """sample, para escolher as entradas de um caso"""
+    return sample
@@ -0,0 +1,33 @@
+import pytest
+
+from emulator import CPU, CPUBase
+from emulator import cache
+from emulator.cache import CACHE_DIR_ENV
+from emulator.components import ALU
+from emulator.components.alu import _DISPATCH
+
+INVALID = next(bits for bits in range(1, 256) if _DISPATCH[bits] is None)
+
+
+def test_invalid_operation_is_rejected():
+    tables = CPUBase.tables()
+    fields = list(tables.control_store[0])
+    fields[2] = INVALID
+    with pytest.raises(ValueError):
+        CPUBase._validate(tables._replace(control_store=[tuple(fields)]))
+
+
+def test_firmware_is_validated_once(monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, "")  # monta o firmware, sem o cache em disco
+    monkeypatch.setattr(cache, "_tables", {})
+    calls = []
+    validate = ALU.validate
+    monkeypatch.setattr(ALU, "validate", lambda bits: calls.append(validate(bits)))
+
+    cpu = CPU()
+    validated = len(calls)
+    assert validated == sum(1 for fields in cpu.control_store if fields[2])
+    CPU()
+    CPU().fork()
+    CPUBase.tables()  # as mesmas tabelas da CPU
+    assert len(calls) == validated
@@ -0,0 +1,93 @@
+import hashlib
+import os
+
+import pytest
+
+from conftest import ROOT, assemble
+from emulator import Assembler
+
+# sha256 da imagem e nomes gerados pelo assembler original (antes das otimizações)
+GOLDEN = {
+    "questao1.asm": (
+        "ea7807dfd91580ffefa473e7f439766debd6c1d1364d80bb36e2fa232999c900",
+        {
+            "in_out": 4,
+            "cem": 8,
+            "dois": 12,
+            "oito": 16,
+            "vintcinc": 20,
+            "main": 24,
+            "div400_cont": 31,
+            "div4": 38,
+            "div100": 45,
+            "biss": 55,
+            "nao_biss": 58,
+            "fim": 61,
+        },
+    ),
+    "questao1_corrigida.asm": (
+        "ab7dc257a63d7da73c87f58c62d7ddbbd15809d474def2826db3e1611985bbdd",
+        {
+            "in_out": 4,
+            "cem": 8,
+            "qrtcents": 12,
+            "main": 16,
+            "div4": 25,
+            "div100": 32,
+            "biss": 41,
+            "nao_biss": 44,
+            "fim": 47,
+        },
+    ),
+    "questao2.asm": (
+        "d0b0df6b0b20ea3a1f86394160920e91156773787c03cc5519cc0ed18e8ea76e",
+        {"in_out": 4, "c": 8, "main": 12, "loop": 20, "zero": 30, "end": 33},
+    ),
+    "questao3.asm": (
+        "6cd0493a628f053e77dad327221077bd219e72f9dd07ba03ffbd7c669a0757cd",
+        {
+            "in_out": 4,
+            "last": 8,
+            "curr": 12,
+            "div": 16,
+            "tres": 20,
+            "dois": 24,
+            "main": 28,
+            "primeiro": 44,
+            "prox_num": 47,
+            "achou": 56,
+            "loop": 67,
+            "end": 80,
+        },
+    ),
+    "questao4.asm": (
+        "acefc36b17f1400fe0bee1386dd2f74fb8cacc7688ddd92b75b6d00fea756e5f",
+        {
+            "in_out": 4,
+            "out": 8,
+            "d": 12,
+            "main": 16,
+            "eh_par": 28,
+            "multip": 37,
+            "inc": 59,
+            "final": 69,
+        },
+    ),
+}
+
+
+@pytest.mark.parametrize("source", sorted(GOLDEN))
+def test_image_and_names_unchanged(source):
+    image, names = assemble(source)
+    digest, expected_names = GOLDEN[source]
+    assert hashlib.sha256(image).hexdigest() == digest
+    assert names == expected_names
+
+
+@pytest.mark.parametrize("source", sorted(GOLDEN))
+def test_output_file_matches_image(tmp_path, source):
+    output = tmp_path / "program.bin"
+    assembler = Assembler(os.path.join(ROOT, source), str(output), cache=False)
+    image = assembler.execute()
+    assert output.read_bytes() == image
+    assert hashlib.sha256(image).hexdigest() == GOLDEN[source][0]
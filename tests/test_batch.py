@@ -0,0 +1,83 @@
+import sys
+
+import pytest
+
+import main
+from emulator.batch import run_batch
+from emulator.benchmark import CASES
+
+
+@pytest.mark.parametrize("mode", ("step", "fast"))
+def test_batch_matches_cpu(programs, new_cpu, mode):
+    case = CASES[3]
+    image, _ = programs[case.name]
+    values = list(case.values)
+    results = list(
+        run_batch(image, ({case.word: v} for v in values), mode=mode, workers=2)
+    )
+    assert [result.job for result in results] == list(range(len(values)))
+    for value, result in zip(values, results):
+        cpu = new_cpu(case, value)
+        assert result.ticks == cpu.execute("fast")
+        assert result.halted
+        assert result.registers["X"] == cpu._regs.X
+        assert result.words == {case.word: cpu._memory.read_word(case.word)}
+
+
+def test_batch_max_ticks(programs):
+    case = CASES[2]
+    image, names = programs[case.name]
+    patches = [{"in_out": 3}, {"in_out": 100}]
+    results = list(run_batch(image, patches, names=names, workers=1, max_ticks=500))
+    assert [(result.halted, result.ticks < 500) for result in results] == [
+        (True, True),
+        (False, False),
+    ]
+    assert results[1].ticks == 500
+
+
+def test_batch_native_rejects_max_ticks(programs):
+    with pytest.raises(ValueError):
+        list(run_batch(programs["questao1"][0], [{}], mode="native", max_ticks=10))
+
+
+def test_batch_vector(programs, new_cpu):
+    pytest.importorskip("numpy")
+    case = CASES[2]
+    image, _ = programs[case.name]
+    values = [0, 5, 66, 100]
+    results = list(
+        run_batch(image, ({case.word: v} for v in values), mode="vector", workers=1)
+    )
+    for value, result in zip(values, results):
+        cpu = new_cpu(case, value)
+        assert result.ticks == cpu.execute("fast")
+        assert result.halted
+        assert result.words == {case.word: cpu._memory.read_word(case.word)}
+
+
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        ([], 10_000_000),
+        (["--max-ticks", "0"], 0),
+        (["--mode", "native"], 0),
+        (["--mode", "native", "--max-ticks", "0"], 0),
+    ],
+)
+def test_cli_max_ticks(monkeypatch, options, expected):
+    monkeypatch.setattr(
+        sys, "argv", ["main.py", "batch", "questao2.asm", "--values", "3:5", *options]
+    )
+    assert main._arguments().max_ticks == expected
+
+
+def test_cli_rejects_max_ticks_in_native_mode(monkeypatch):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["main.py", "batch", "questao2.asm", "--values", "3:5", "--mode", "native"]
+        + ["--max-ticks", "50"],
+    )
+    with pytest.raises(SystemExit):
+        main._arguments()
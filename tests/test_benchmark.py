@@ -0,0 +1,71 @@
+import sys
+
+import pytest
+
+import main
+from emulator import benchmark
+from emulator.benchmark import BenchmarkResult
+
+
+def result(mode: str, rate: float, memory: int = 1000, steps=None) -> BenchmarkResult:
+    return BenchmarkResult(
+        "caso", mode, [0, 2], steps or [10, 20], [1, 2], 30 / rate, rate, memory
+    )
+
+
+def baseline(*results: BenchmarkResult) -> dict:
+    return {r.key: r.to_dict() for r in results}
+
+
+REFERENCE_RESULTS = [result("step", 100.0), result("blocks", 800.0)]
+REFERENCE = baseline(*REFERENCE_RESULTS)
+
+
+def test_compare_accepts_baseline():
+    assert benchmark.compare(REFERENCE_RESULTS, REFERENCE) == []
+
+
+def test_compare_uses_speedup_over_step():
+    """Uma máquina duas vezes mais lenta mantém o ganho sobre o modo step"""
+    results = [result("step", 50.0), result("blocks", 400.0)]
+    assert benchmark.compare(results, REFERENCE) == []
+
+
+def test_compare_fails_on_speedup_drop():
+    results = [result("step", 100.0), result("blocks", 600.0)]
+    problems = benchmark.compare(results, REFERENCE)
+    assert problems == ["caso/blocks: 6.00x faster than step, baseline 8.00x"]
+    assert benchmark.compare(results, REFERENCE, tolerance=0.3) == []
+
+
+def test_compare_skips_speed_without_step():
+    assert benchmark.compare([result("blocks", 100.0)], REFERENCE) == []
+
+
+def test_compare_fails_on_memory_increase():
+    results = [result("step", 100.0), result("blocks", 800.0, memory=1300)]
+    problems = benchmark.compare(results, REFERENCE)
+    assert len(problems) == 1 and "peak memory" in problems[0]
+
+
+def test_compare_fails_on_different_steps():
+    results = [result("step", 100.0), result("blocks", 800.0, steps=[10, 21])]
+    problems = benchmark.compare(results, REFERENCE)
+    assert problems == ["caso/blocks: steps for input 1: expected 20, got 21"]
+
+
+def test_bench_exits_with_error_on_regression(tmp_path, monkeypatch, capsys):
+    """O comando bench sai com código 1 quando o ganho cai abaixo da referência"""
+    path = tmp_path / "baseline.json"
+    benchmark.save_baseline(str(path), REFERENCE_RESULTS)
+    measured = [result("step", 100.0), result("blocks", 600.0)]
+    monkeypatch.setattr(benchmark, "run_benchmarks", lambda *args: measured)
+    argv = ["main.py", "bench", "--mode", "blocks", "--baseline", str(path)]
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(SystemExit) as error:
+        main.bench(main._arguments())
+    assert error.value.code == 1
+    assert "regressão: caso/blocks" in capsys.readouterr().out
+
+    monkeypatch.setattr(sys, "argv", argv + ["--tolerance", "0.3"])
+    main.bench(main._arguments())
@@ -0,0 +1,67 @@
+import pytest
+
+from emulator.benchmark import CASES
+from emulator.blocks import BlockCompiler
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_blocks_match_step(new_cpu, state, values, case):
+    for value in values(case):
+        reference = new_cpu(case, value)
+        ticks = reference.execute("step")
+        cpu = new_cpu(case, value)
+        assert cpu.execute("blocks") == ticks, value
+        assert state(cpu) == state(reference), value
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_max_ticks_matches_step(new_cpu, state, case):
+    value = case.values[len(case.values) // 2]
+    total = new_cpu(case, value).execute("step")
+    for max_ticks in sorted({0, 1, 7, total // 3, total // 2 + 1, total - 1, total}):
+        reference = new_cpu(case, value)
+        ticks = reference.execute("step", max_ticks)
+        cpu = new_cpu(case, value)
+        assert cpu.execute("blocks", max_ticks) == ticks, max_ticks
+        assert state(cpu, False) == state(reference, False), max_ticks
+
+
+def test_resume_after_max_ticks(new_cpu, state):
+    case = CASES[2]
+    reference = new_cpu(case, 40)
+    total = reference.execute("step")
+    cpu = new_cpu(case, 40)
+    ticks = 0
+    while ticks < total:
+        ticks += cpu.execute("blocks", 97)
+    assert ticks == total
+    assert state(cpu) == state(reference)
+
+
+def test_blocks_cover_firmware(new_cpu):
+    cpu = new_cpu(CASES[0], 2000)
+    blocks = BlockCompiler(cpu.firmware, cpu.control_store).compile()
+    assert len(blocks) == len(cpu.firmware)
+    for mpc, instruction in enumerate(cpu.firmware):
+        assert (blocks[mpc] is None) == (not instruction), mpc
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_each_block_matches_steps(new_cpu, state, case):
+    """Cada bloco executado uma vez equivale a len(bloco) passos a partir do mesmo estado"""
+    cpu = new_cpu(case, case.values[0])
+    compiler = BlockCompiler(cpu.firmware, cpu.control_store)
+    blocks = compiler.compile()
+    reference = new_cpu(case, case.values[0])
+    regs, alu, bus = cpu._regs, cpu._alu, cpu._bus
+    memory = cpu._memory
+    while block := blocks[regs.MPC]:
+        function, size = block
+        mpc = function(
+            regs._file, alu, bus, memory.read_byte, memory.read_word, memory.write_word
+        )
+        regs.MPC = mpc
+        regs.MIR = cpu.firmware[mpc]
+        assert reference.execute("step", size) == size
+        assert state(cpu, False, False) == state(reference, False, False)
+    assert state(cpu, False) == state(reference, False)
@@ -0,0 +1,137 @@
+import hashlib
+import os
+
+import pytest
+
+from conftest import ROOT
+from emulator import CPU, Assembler, CPUBase
+from emulator import cache, cpu_base
+from emulator.cache import CACHE_DIR_ENV, source_key
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Cache em disco vazio em um diretório temporário, sem tabelas no processo"""
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    monkeypatch.setattr(cache, "_tables", {})
+    return tmp_path
+
+
+def firmware_files(directory) -> list[str]:
+    return sorted(
+        name for name in os.listdir(directory) if name.startswith("firmware-")
+    )
+
+
+def test_tables_are_shared_by_cpu_and_assembler(cache_dir, monkeypatch):
+    builds = []
+    build = CPUBase._build.__func__
+    monkeypatch.setattr(
+        CPUBase, "_build", classmethod(lambda cls: builds.append(cls) or build(cls))
+    )
+
+    Assembler("questao1.asm", None, cache=False)
+    cpu = CPU()
+    assert CPU.tables() is CPUBase.tables()
+    assert cpu.firmware is CPUBase.tables().firmware
+    assert builds == [CPUBase]
+    assert len(firmware_files(cache_dir)) == 1
+
+
+def test_tables_are_loaded_from_disk(cache_dir, monkeypatch):
+    built = CPUBase.tables()
+    monkeypatch.setattr(cache, "_tables", {})
+    monkeypatch.setattr(
+        CPUBase, "_build", classmethod(lambda cls: pytest.fail("built"))
+    )
+    loaded = CPU.tables()
+    assert loaded.firmware == built.firmware
+    assert loaded.control_store == built.control_store
+    assert loaded.ops_dict == built.ops_dict
+
+
+def test_key_depends_only_on_cpu_base():
+    """cpu.py não entra na chave: alterá-lo não gera um novo firmware"""
+    digest = hashlib.sha256(f"{cache._FORMAT}:emulator.cpu_base.CPUBase".encode())
+    with open(cpu_base.__file__, "rb") as source:
+        digest.update(source.read())
+    assert source_key(CPUBase) == digest.hexdigest()
+
+
+def test_subclass_with_its_own_microcode(cache_dir):
+    class Custom(CPUBase):
+        def _control(self) -> None:
+            CPUBase._control(self)
+
+    assert Custom.tables() is not CPUBase.tables()
+    assert Custom.tables() is Custom.tables()
+
+
+def test_old_firmware_files_are_pruned(cache_dir):
+    for name in ("firmware-old1.pickle", "firmware-old2.pickle"):
+        (cache_dir / name).write_bytes(b"")
+    (cache_dir / "assembly").mkdir()
+    CPUBase.tables()
+    assert len(firmware_files(cache_dir)) == 1
+    assert "firmware-old1.pickle" not in firmware_files(cache_dir)
+    assert (cache_dir / "assembly").is_dir()
+
+
+def copy_source(directory, name: str = "questao1.asm") -> str:
+    """Copia um programa do repositório para o diretório (para poder alterá-lo)"""
+    path = directory / name
+    with open(os.path.join(ROOT, name), "rb") as src:
+        path.write_bytes(src.read())
+    return str(path)
+
+
+def test_assembly_cache_hit(cache_dir, monkeypatch):
+    source = copy_source(cache_dir)
+    first = Assembler(source, None)
+    image = first.execute()
+    assert len(os.listdir(cache_dir / "assembly")) == 1
+
+    monkeypatch.setattr(Assembler, "_assemble", lambda *args: pytest.fail("assembled"))
+    second = Assembler(source, None)
+    assert second.execute() == image
+    assert second.names == first.names
+
+
+def test_assembly_cache_invalidated_by_source_edit(cache_dir):
+    source = copy_source(cache_dir)
+    image = Assembler(source, None).execute()
+    with open(source, "a") as src:
+        src.write("\nextra wb 7\n")
+
+    edited = Assembler(source, None)
+    assert edited.execute() == image + bytes([7])
+    assert "extra" in edited.names
+    assert len(os.listdir(cache_dir / "assembly")) == 2
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    for age, name in enumerate(("new", "middle", "old", "oldest")):
+        path = tmp_path / f"{name}.pickle"
+        path.write_bytes(bytes(100))
+        os.utime(path, (1000 - age, 1000 - age))
+    (tmp_path / "other.tmp").write_bytes(bytes(1000))  # não é do cache
+
+    cache._evict(str(tmp_path), 250)
+    assert sorted(os.listdir(tmp_path)) == ["middle.pickle", "new.pickle", "other.tmp"]
+    cache._evict(str(tmp_path), 200)
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_loaded_assembly_is_kept_longer(cache_dir):
+    """load_assembly atualiza o mtime: o programa lido é o último a ser removido"""
+    first, second = (copy_source(cache_dir, f"questao{n}.asm") for n in (1, 2))
+    for source, age in ((first, 100), (second, 50)):
+        assembler = Assembler(source, None)
+        assembler.execute()
+        path = cache._assembly_path(assembler._cache_key())
+        os.utime(path, (age, age))
+
+    Assembler(first, None).execute()  # lido do cache
+    first_path = cache._assembly_path(Assembler(first, None)._cache_key())
+    cache._evict(str(cache_dir / "assembly"), os.path.getsize(first_path))
+    assert os.listdir(cache_dir / "assembly") == [os.path.basename(first_path)]
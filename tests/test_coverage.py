@@ -0,0 +1,40 @@
+import pytest
+
+from emulator import CPUBase
+from emulator.benchmark import CASES
+from emulator.coverage import Coverage
+
+BASE = CPUBase()
+
+
+def counts(coverage: Coverage) -> tuple:
+    return list(coverage.hits), list(coverage.taken)
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_blocks_coverage_matches_step(new_cpu, case):
+    step, blocks = Coverage(BASE), Coverage(BASE)
+    for value in case.values[:: max(len(case.values) // 10, 1)]:
+        ticks = new_cpu(case, value).execute("step", coverage=step)
+        assert new_cpu(case, value).execute("blocks", coverage=blocks) == ticks
+        assert counts(blocks) == counts(step), value  # inclusive entre execuções
+    assert step.ticks == blocks.ticks
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_blocks_coverage_with_max_ticks(new_cpu, case):
+    value = case.values[len(case.values) // 2]
+    for max_ticks in (0, 1, 7, 100, 333):
+        step, blocks = Coverage(BASE), Coverage(BASE)
+        ticks = new_cpu(case, value).execute("step", max_ticks, coverage=step)
+        assert (
+            new_cpu(case, value).execute("blocks", max_ticks, coverage=blocks) == ticks
+        )
+        assert counts(blocks) == counts(step), max_ticks
+        assert blocks.ticks == ticks
+
+
+def test_coverage_rejected_in_other_modes(new_cpu):
+    for mode in ("fast", "native"):
+        with pytest.raises(ValueError):
+            new_cpu(CASES[0], 2000).execute(mode, coverage=Coverage(BASE))
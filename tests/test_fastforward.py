@@ -0,0 +1,90 @@
+import itertools
+
+import pytest
+
+from emulator import CPU, CPUBase
+from emulator.benchmark import CASES
+from emulator.fastforward import fast_forward_table
+from emulator.memory import PagedMemory
+
+BASE = CPUBase()
+TABLE = fast_forward_table(BASE.control_store, BASE._loops)
+VALUES = (0, 1, 2, 3, 7, 12)  # valores de X, Y, K e H no início do laço
+
+
+def loop_cpu(head: int, x: int, y: int, k: int, h: int) -> CPU:
+    """CPU parada no início do laço com os registros dados"""
+    cpu = CPU(memory=PagedMemory())  # os laços não usam a memória
+    cpu._regs.X, cpu._regs.Y, cpu._regs.K, cpu._regs.H = x, y, k, h
+    cpu._regs.MPC = head
+    return cpu
+
+
+def registers(cpu: CPU) -> tuple:
+    return tuple(cpu._regs._file[:9]), cpu._regs.MPC
+
+
+def test_table_has_every_loop():
+    assert {mpc for mpc, skip in enumerate(TABLE) if skip} == set(BASE._loops)
+
+
+@pytest.mark.parametrize("head", sorted(BASE._loops))
+def test_skip_matches_steps(head):
+    """As voltas puladas levam ao mesmo estado que os mesmos passos executados um a um"""
+    skip = TABLE[head]
+    skipped = 0
+    for x, y, k, h in itertools.product(VALUES, repeat=4):
+        cpu = loop_cpu(head, x, y, k, h)
+        ticks = skip(cpu._regs._file)
+        reference = loop_cpu(head, x, y, k, h)
+        assert reference.execute("step", ticks) == ticks
+        assert registers(cpu) == registers(reference), (x, y, k, h)
+        skipped += ticks
+    assert skipped  # algum estado do laço foi avançado
+
+
+@pytest.mark.parametrize("head", sorted(BASE._loops))
+def test_skip_respects_limit(head):
+    skip = TABLE[head]
+    for limit in (0, 1, 5, 20):
+        for x, y, k, h in itertools.product(VALUES, repeat=4):
+            cpu = loop_cpu(head, x, y, k, h)
+            ticks = skip(cpu._regs._file, limit)
+            assert ticks <= limit
+            reference = loop_cpu(head, x, y, k, h)
+            reference.execute("step", ticks)
+            assert registers(cpu) == registers(reference), (limit, x, y, k, h)
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_fast_matches_step(new_cpu, state, values, case):
+    for value in values(case):
+        reference = new_cpu(case, value)
+        ticks = reference.execute("step")
+        cpu = new_cpu(case, value)
+        assert cpu.execute("fast") == ticks, value
+        assert state(cpu) == state(reference), value
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_fast_max_ticks_matches_step(new_cpu, state, case):
+    value = case.values[len(case.values) // 2]
+    total = new_cpu(case, value).execute("step")
+    for max_ticks in sorted({0, 1, 7, total // 3, total // 2 + 1, total - 1, total}):
+        reference = new_cpu(case, value)
+        ticks = reference.execute("step", max_ticks)
+        cpu = new_cpu(case, value)
+        assert cpu.execute("fast", max_ticks) == ticks, max_ticks
+        assert state(cpu, False) == state(reference, False), max_ticks
+
+
+def test_fast_resumes_after_max_ticks(new_cpu, state):
+    case = CASES[2]
+    reference = new_cpu(case, 40)
+    total = reference.execute("step")
+    cpu = new_cpu(case, 40)
+    ticks = 0
+    while ticks < total:
+        ticks += cpu.execute("fast", 97)
+    assert ticks == total
+    assert state(cpu) == state(reference)
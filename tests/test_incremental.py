@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from emulator import Assembler
+from emulator.benchmark import CASES
+from emulator.incremental import IncrementalAssembler
+
+
+def full_assembly(path: str):
+    """Imagem e nomes da montagem completa, ou o tipo do erro"""
+    assembler = Assembler(path, None, cache=False)
+    try:
+        return assembler.execute(), assembler.names
+    except (SyntaxError, ValueError) as error:
+        return type(error)
+
+
+def incremental_assembly(assembler: IncrementalAssembler):
+    try:
+        return assembler.execute(), assembler.names
+    except (SyntaxError, ValueError) as error:
+        return type(error)
+
+
+def edit(lines: list[str], pool: list[str], rng: random.Random) -> None:
+    """Aplica uma edição aleatória: remove, insere, troca ou altera um número"""
+    pos = rng.randrange(len(lines))
+    kind = rng.randrange(4)
+    if kind == 0 and len(lines) > 1:
+        del lines[pos]
+    elif kind == 1:
+        lines.insert(pos, rng.choice(pool))
+    elif kind == 2:
+        lines[pos] = rng.choice(pool)
+    else:
+        tokens = lines[pos].split()
+        numbers = [i for i, token in enumerate(tokens) if token.isdigit()]
+        if numbers:
+            tokens[rng.choice(numbers)] = str(rng.randrange(300))
+            lines[pos] = " ".join(tokens) + "\n"
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_incremental_matches_full(tmp_path, sources, case):
+    path = str(tmp_path / "program.asm")
+    lines = list(sources[case.name])
+    pool = list(lines)  # linhas do mesmo programa, com nomes definidos
+    rng = random.Random(case.name)
+    assembler = IncrementalAssembler(path, None)
+    previous = lines
+    for _ in range(80):
+        with open(path, "w") as src:
+            src.writelines(lines)
+        expected = full_assembly(path)
+        assert incremental_assembly(assembler) == expected, lines
+        if expected in (SyntaxError, ValueError):
+            lines = previous  # desfaz a edição inválida (a próxima montagem é completa)
+        previous = list(lines)
+        edit(lines, pool, rng)
+
+
+def test_edit_reencodes_only_changed_lines(tmp_path, sources):
+    path = str(tmp_path / "program.asm")
+    lines = list(sources["questao4"])
+    with open(path, "w") as src:
+        src.writelines(lines)
+    assembler = IncrementalAssembler(path, None)
+    assembler.execute()
+
+    pos = lines.index("          add1Y\n")
+    lines.insert(pos, "          add1Y\n")  # desloca os marcadores seguintes
+    with open(path, "w") as src:
+        src.writelines(lines)
+    image = assembler.execute()
+    assert assembler.reencoded == 1
+    assert (image, assembler.names) == full_assembly(path)
+
+
+def test_output_file(tmp_path, sources):
+    path = str(tmp_path / "program.asm")
+    output = str(tmp_path / "program.bin")
+    with open(path, "w") as src:
+        src.writelines(sources["questao1"])
+    image = IncrementalAssembler(path, output).execute()
+    with open(output, "rb") as binary:
+        assert binary.read() == image
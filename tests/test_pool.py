@@ -0,0 +1,94 @@
+import pytest
+
+from emulator import CPU
+from emulator.benchmark import CASES
+from emulator.memory import PAGE_WORDS, Memory, PagedMemory
+from emulator.pool import CPUPool
+
+BACKENDS = (Memory, PagedMemory)
+FAR = 200 * PAGE_WORDS  # palavra em uma página fora da imagem
+
+
+def loaded(programs, memory_type) -> CPU:
+    cpu = CPU(memory=memory_type())
+    cpu.load_image(*programs["questao2"])
+    return cpu
+
+
+@pytest.mark.parametrize("memory_type", BACKENDS, ids=lambda t: t.__name__)
+def test_reset_restores_the_image(programs, new_cpu, memory_type):
+    cpu = loaded(programs, memory_type)
+    image = dict(cpu._memory.items())
+    cpu.set_var("in_out", 10)
+    cpu._memory.write_word(FAR, 7)
+    cpu.execute("fast")
+    cpu.reset()
+    assert dict(cpu._memory.items()) == image
+    assert cpu._regs.MPC == 0 and cpu._regs.X == 0
+
+    cpu.set_var("in_out", 5)  # mesma execução que uma CPU nova
+    reference = new_cpu(CASES[2], 5)
+    assert cpu.execute("fast") == reference.execute("fast")
+    assert dict(cpu._memory.items()) == dict(reference._memory.items())
+
+
+def test_reset_copies_only_dirty_pages(programs):
+    cpu = loaded(programs, Memory)
+    memory = cpu._memory
+    memory._memory[FAR] = 99  # sem passar por write_word: a página não fica suja
+    cpu.set_var("in_out", 10)
+    assert memory._dirty == {0}
+    cpu.reset()
+    assert memory._memory[FAR] == 99  # página limpa: não foi copiada
+    assert cpu.get_var("in_out") == 6
+    assert not memory._dirty
+
+
+def test_paged_reset_shares_the_saved_pages(programs):
+    cpu = loaded(programs, PagedMemory)
+    memory = cpu._memory
+    saved = memory._pages[0]
+    cpu.set_var("in_out", 10)
+    cpu._memory.write_word(FAR, 7)
+    assert memory._pages[0] is not saved  # copiada na escrita
+    cpu.reset()
+    assert memory._pages[0] is saved
+    assert memory.allocated_pages == 1
+    assert not memory._dirty
+
+
+def test_pool_returns_cpus_with_the_loaded_image(programs):
+    image, names = programs["questao2"]
+    pool = CPUPool(image, names, size=1)
+    cpu = pool.acquire()
+    initial = dict(cpu._memory.items())
+    cpu.set_var("in_out", 12)
+    cpu.execute("fast")
+    pool.release(cpu)
+
+    again = pool.acquire()
+    assert again is cpu
+    assert dict(again._memory.items()) == initial
+    assert again.get_var("in_out") == 6
+    assert again._regs.MPC == 0 and again._regs.H == 0
+    assert again.names == names
+
+
+def test_pool_keeps_at_most_size_cpus(programs):
+    pool = CPUPool(*programs["questao2"], size=1)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert pool.acquire() is first
+    assert pool.acquire() not in (first, second)
+
+
+def test_pool_context_manager(programs):
+    pool = CPUPool(*programs["questao2"])
+    with pool.cpu() as cpu:
+        cpu.set_var("in_out", 4)
+        cpu.execute("fast")
+        assert cpu.get_var("in_out") == 24
+    with pool.cpu() as again:
+        assert again is cpu
+        assert again.get_var("in_out") == 6
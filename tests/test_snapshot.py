@@ -0,0 +1,136 @@
+from typing import Optional
+
+import pytest
+
+from emulator import CPU
+from emulator.benchmark import CASES
+from emulator.memory import PAGE_WORDS, Memory, PagedMemory
+
+both_backends = pytest.mark.parametrize(
+    "memory_type", (Memory, PagedMemory), ids=lambda t: t.__name__
+)
+CASE = CASES[2]  # questao2: fatorial de in_out
+FAR = 200 * PAGE_WORDS  # palavra em uma página fora da imagem
+
+
+def loaded(programs, memory_type, value: Optional[int] = None) -> CPU:
+    cpu = CPU(memory=memory_type())
+    cpu.load_image(*programs[CASE.name])
+    if value is not None:
+        cpu._memory.write_word(CASE.word, value)
+    return cpu
+
+
+def state(cpu: CPU) -> tuple:
+    regs = cpu._regs
+    return tuple(regs._file[:9]), regs.MPC, dict(cpu._memory.items())
+
+
+@both_backends
+def test_fork_is_isolated_from_the_parent(programs, memory_type):
+    parent = loaded(programs, memory_type, 5)
+    parent.execute("step", 40)
+    child = parent.fork()
+    before = state(child)
+
+    parent._memory.write_word(CASE.word, 9)  # escrita no pai depois do fork
+    parent._memory.write_word(FAR, 1)
+    parent.execute("fast")
+    assert state(child) == before
+
+    child._memory.write_word(FAR + 1, 2)
+    child.execute("fast")
+    assert parent._memory.read_word(FAR + 1) == 0
+    assert child._memory.read_word(FAR) == 0
+    assert child._memory.read_word(CASE.word) == 120
+
+
+@both_backends
+def test_fork_continues_like_the_parent(programs, memory_type):
+    parent = loaded(programs, memory_type, 6)
+    parent.execute("step", 100)
+    child = parent.fork()
+    assert child.execute("fast") == parent.execute("fast")
+    assert state(child) == state(parent)
+
+
+@both_backends
+def test_restore_is_repeatable(programs, memory_type):
+    cpu = loaded(programs, memory_type, 7)
+    cpu.execute("step", 30)
+    snapshot = cpu.snapshot()
+    expected = state(cpu)
+
+    results = []
+    for value in (3, 4, 3):
+        cpu.restore(snapshot)
+        assert state(cpu) == expected
+        cpu._memory.write_word(CASE.word, value)
+        cpu._memory.write_word(FAR, value)
+        cpu.execute("fast")
+        results.append(cpu._memory.read_word(CASE.word))
+    assert results[0] == results[2]
+    assert snapshot.memory.read_word(FAR) == 0  # o snapshot nunca é alterado
+
+    cpu.restore(snapshot)
+    assert state(cpu) == expected
+
+
+@both_backends
+def test_reset_after_fork(programs, memory_type):
+    parent = loaded(programs, memory_type)
+    image = dict(parent._memory.items())  # in_out = 6
+    parent._memory.write_word(CASE.word, 5)
+    parent.execute("step", 50)
+    child = parent.fork()
+
+    child.reset()
+    assert dict(child._memory.items()) == image
+    assert child._regs.MPC == 0
+    assert parent._memory.read_word(CASE.word) == 5
+
+    parent.execute("fast")
+    parent.reset()
+    assert dict(parent._memory.items()) == image
+    child._memory.write_word(CASE.word, 4)
+    child.execute("fast")
+    assert child._memory.read_word(CASE.word) == 24
+    assert dict(parent._memory.items()) == image
+
+
+def test_paged_fork_shares_pages_until_written():
+    memory = PagedMemory()
+    memory.write_word(1, 10)
+    memory.write_word(FAR, 20)
+    clone = memory.fork()
+    assert clone._pages[0] is memory._pages[0]
+
+    memory.write_word(1, 11)
+    assert clone.read_word(1) == 10
+    assert clone._pages[0] is not memory._pages[0]
+    assert clone._pages[FAR // PAGE_WORDS] is memory._pages[FAR // PAGE_WORDS]
+
+    clone.write_byte(FAR * 4, 0xFF)
+    assert memory.read_word(FAR) == 20
+    assert clone.read_word(FAR) == (20 & ~0xFF) | 0xFF
+
+
+def test_paged_checkpoint_and_restore():
+    memory = PagedMemory()
+    memory.write_word(1, 10)
+    memory.checkpoint()
+    for _ in range(2):
+        memory.write_word(1, 99)
+        memory.write_word(FAR, 5)
+        memory.restore()
+        assert dict(memory.items()) == {1: 10}
+        assert memory.allocated_pages == 1
+
+    clone = memory.fork()
+    clone.write_word(1, 50)
+    clone.restore()
+    assert clone.read_word(1) == 10
+    memory.write_word(1, 60)
+    assert clone.read_word(1) == 10
+    memory.restore()
+    assert memory.read_word(1) == 10
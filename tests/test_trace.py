@@ -0,0 +1,20 @@
+from emulator.benchmark import CASES
+from emulator.trace import TraceReader
+
+
+def test_seek_and_memory_match_cpu(tmp_path, new_cpu):
+    """O estado e a memória lidos do trace são os da CPU parada no mesmo passo"""
+    case = CASES[2]
+    path = str(tmp_path / "run.trace")
+    total = new_cpu(case, 66).execute(trace=path)
+    trace = TraceReader(path)
+    assert len(trace) == total
+
+    for tick in sorted({0, 1, 4095, 4096, 4097, total // 3, total - 1, total}):
+        cpu = new_cpu(case, 66)
+        cpu.execute(max_ticks=tick)
+        assert trace.memory(tick) == dict(cpu._memory.items()), tick
+        state = trace.seek(tick)
+        assert state.mpc == cpu._regs.MPC, tick
+        for name in ("X", "Y", "H", "K", "PC", "MDR", "MAR"):
+            assert state.registers[name] == getattr(cpu._regs, name), (tick, name)
@@ -0,0 +1,32 @@
+import pytest
+
+from emulator.benchmark import CASES
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_native_matches_step(new_cpu, state, values, case):
+    for value in values(case):
+        reference = new_cpu(case, value)
+        ticks = reference.execute("step")
+        cpu = new_cpu(case, value)
+        assert cpu.execute("native") == ticks, value
+        assert state(cpu) == state(reference), value
+
+
+def test_native_reuses_translation_after_reset(new_cpu, state):
+    case = CASES[3]
+    cpu = new_cpu(case, 5)
+    cpu.execute("native")
+    program = cpu._native
+    for value in (6, 7):
+        cpu.reset()
+        cpu._memory.write_word(case.word, value)
+        reference = new_cpu(case, value)
+        assert cpu.execute("native") == reference.execute("step")
+        assert state(cpu) == state(reference)
+    assert cpu._native is program
+
+
+def test_native_rejects_max_ticks(new_cpu):
+    with pytest.raises(ValueError):
+        new_cpu(CASES[0], 2000).execute("native", 10)
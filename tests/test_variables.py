@@ -0,0 +1,42 @@
+import pytest
+
+from emulator import CPU
+from emulator.benchmark import CASES
+
+
+def test_set_var_writes_the_input_word(programs, new_cpu):
+    case = CASES[2]
+    image, names = programs[case.name]
+    cpu = CPU()
+    cpu.load_image(image, names)
+    cpu.set_var("in_out", 5)
+    assert cpu._memory.read_word(names["in_out"] // 4) == 5
+    assert cpu.get_var("in_out") == 5
+
+    reference = new_cpu(case, 5)
+    assert cpu.execute("fast") == reference.execute("fast")
+    assert cpu.get_var("in_out") == reference._memory.read_word(case.word) == 120
+
+
+def test_set_var_masks_to_32_bits(programs):
+    cpu = CPU()
+    cpu.load_image(*programs["questao2"])
+    cpu.set_var("in_out", -1)
+    assert cpu.get_var("in_out") == 0xFFFFFFFF
+
+
+def test_unknown_variable(programs):
+    cpu = CPU()
+    cpu.load_image(*programs["questao2"])
+    with pytest.raises(KeyError):
+        cpu.set_var("missing", 1)
+    with pytest.raises(KeyError):
+        cpu.get_var("missing")
+
+
+def test_names_are_copied(programs):
+    image, names = programs["questao2"]
+    cpu = CPU()
+    cpu.load_image(image, names)
+    cpu.names["in_out"] = 0
+    assert names["in_out"] == 4
@@ -0,0 +1,68 @@
+import pytest
+
+from emulator.benchmark import CASES
+
+np = pytest.importorskip("numpy")
+
+from emulator.vector import VectorCPU  # noqa: E402
+
+NAMES = ("X", "Y", "H", "K", "PC", "MDR", "MAR")
+
+
+def check_lanes(vector: VectorCPU, values, cpus) -> None:
+    """Compara cada lane com a CPU que executou a mesma entrada"""
+    registers = {name: vector.register(name) for name in NAMES}
+    halted = vector.halted()
+    for lane, (value, cpu) in enumerate(zip(values, cpus)):
+        for name in NAMES:
+            assert int(registers[name][lane]) == getattr(cpu._regs, name), (value, name)
+        assert bool(halted[lane]) == cpu.halted, value
+        memory = vector.scalar[lane]._memory if lane in vector.scalar else None
+        for address in range(vector.words):
+            expected = cpu._memory.read_word(address)
+            if memory is None:
+                assert int(vector.memory[lane, address]) == expected, (value, address)
+            else:
+                assert memory.read_word(address) == expected, (value, address)
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_vector_matches_cpu(programs, new_cpu, case):
+    image, _ = programs[case.name]
+    values = list(case.values)
+    vector = VectorCPU(image, len(values))
+    vector.set_word(case.word, values)
+    ticks = vector.execute()
+
+    cpus = [new_cpu(case, value) for value in values]
+    for lane, (value, cpu) in enumerate(zip(values, cpus)):
+        assert int(ticks[lane]) == cpu.execute("fast"), value
+    check_lanes(vector, values, cpus)
+
+
+def test_vector_leaves_arrays_before_overflow(programs, new_cpu):
+    """Na questão 2, fatoriais grandes passam dos 64 bits e seguem em uma CPU comum"""
+    case = CASES[2]
+    vector = VectorCPU(programs[case.name][0], 3)
+    vector.set_word(case.word, [5, 66, 100])
+    ticks = vector.execute()
+    assert int(ticks[1]) == 7760
+    assert {1, 2} <= set(vector.scalar)
+    assert 0 not in vector.scalar
+    cpus = [new_cpu(case, value) for value in (5, 66, 100)]
+    assert [int(t) for t in ticks] == [cpu.execute("fast") for cpu in cpus]
+    check_lanes(vector, [5, 66, 100], cpus)
+
+
+def test_vector_resumes_after_max_ticks(programs, new_cpu):
+    case = CASES[2]
+    values = [0, 12, 66, 100]
+    vector = VectorCPU(programs[case.name][0], len(values))
+    vector.set_word(case.word, values)
+    vector.execute(max_ticks=500)
+    assert not vector.halted().all()
+    ticks = vector.execute()
+    assert vector.halted().all()
+    cpus = [new_cpu(case, value) for value in values]
+    assert [int(t) for t in ticks] == [cpu.execute("fast") for cpu in cpus]
+    check_lanes(vector, values, cpus)